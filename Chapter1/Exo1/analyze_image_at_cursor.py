@@ -1,17 +1,114 @@
-from typing import Tuple
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple
 
-from cv2 import meanStdDev, imshow, waitKey, calcHist, destroyAllWindows, setMouseCallback, EVENT_MOUSEMOVE, \
-    FONT_HERSHEY_SIMPLEX, mean, putText, imread, rectangle, namedWindow
-from matplotlib.pyplot import xlim, figure, ylabel, plot, show, xlabel, title, close
-from numpy import ndarray
+from cv2 import imshow, waitKey, destroyAllWindows, setMouseCallback, EVENT_MOUSEMOVE, FONT_HERSHEY_SIMPLEX, \
+    putText, imread, rectangle, namedWindow, getTextSize
+from matplotlib.pyplot import xlim, figure, ylabel, plot, show, xlabel, title, close, subplots
+from numpy import ndarray, zeros
 
+from Chapter1.Exo1.window_stats import WindowStats
 
-def analyze_image(image_path: str) -> None:
-    def calculate_histogram(window: ndarray) -> Tuple[ndarray, ndarray, ndarray]:
-        hist_b = calcHist([window], [0], None, [256], [0, 256])
-        hist_g = calcHist([window], [1], None, [256], [0, 256])
-        hist_r = calcHist([window], [2], None, [256], [0, 256])
-        return hist_b, hist_g, hist_r
+Bounds = Tuple[int, int, int, int]
+
+
+class HistogramFigure:
+    """
+    A single matplotlib figure whose histogram lines are updated in place.
+    """
+
+    def __init__(self, bins: int = 256):
+        """
+        Create the figure and one line per color channel.
+
+        Args:
+            bins (int): Number of histogram bins. Defaults to 256.
+        """
+        self.fig, self.ax = subplots()
+        self.ax.set_title("Color Histogram")
+        self.ax.set_xlabel("Bins")
+        self.ax.set_ylabel("# of Pixels")
+        self.ax.set_xlim([0, bins])
+        self.lines = [self.ax.plot(zeros(bins), color=color)[0] for color in ('b', 'g', 'r')]
+        show(block=False)
+
+    def update(self, hist_b: ndarray, hist_g: ndarray, hist_r: ndarray) -> None:
+        """
+        Replace the line data and schedule a redraw of the figure.
+
+        Args:
+            hist_b (np.ndarray): Histogram of the blue channel.
+            hist_g (np.ndarray): Histogram of the green channel.
+            hist_r (np.ndarray): Histogram of the red channel.
+        """
+        for line, hist in zip(self.lines, (hist_b, hist_g, hist_r)):
+            line.set_ydata(hist)
+        self.ax.set_ylim(0, max(hist_b.max(), hist_g.max(), hist_r.max(), 1) * 1.05)
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
+
+
+class OverlayCanvas:
+    """
+    A display buffer that only restores and redraws the regions touched by overlays.
+    """
+
+    def __init__(self, image: ndarray):
+        """
+        Args:
+            image (np.ndarray): Image shown under the overlays.
+        """
+        self.image = image
+        self.canvas = image.copy()
+        self._dirty: List[Bounds] = []
+
+    def restore(self) -> None:
+        """
+        Copy the original pixels back into every region drawn since the last restore.
+        """
+        for x0, y0, x1, y1 in self._dirty:
+            self.canvas[y0:y1, x0:x1] = self.image[y0:y1, x0:x1]
+        self._dirty.clear()
+
+    def _mark(self, x0: int, y0: int, x1: int, y1: int) -> None:
+        height, width = self.image.shape[:2]
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(width, x1), min(height, y1)
+        if x0 < x1 and y0 < y1:
+            self._dirty.append((x0, y0, x1, y1))
+
+    def rectangle(self, top_left: Tuple[int, int], bottom_right: Tuple[int, int], color: Tuple[int, int, int],
+                  thickness: int) -> None:
+        rectangle(self.canvas, top_left, bottom_right, color, thickness)
+        self._mark(top_left[0] - thickness, top_left[1] - thickness,
+                   bottom_right[0] + thickness + 1, bottom_right[1] + thickness + 1)
+
+    def put_text(self, text: str, org: Tuple[int, int], scale: float, color: Tuple[int, int, int],
+                 thickness: int) -> None:
+        putText(self.canvas, text, org, FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+        (text_width, text_height), baseline = getTextSize(text, FONT_HERSHEY_SIMPLEX, scale, thickness)
+        self._mark(org[0] - thickness, org[1] - text_height - thickness,
+                   org[0] + text_width + thickness, org[1] + baseline + thickness)
+
+
+def analyze_image(image_path: str, window_size: int = 11, persistent: bool = True,
+                  target_fps: float = 30.0) -> Optional[float]:
+    """
+    Display an image and show the statistics of the window under the mouse cursor.
+
+    In persistent mode, mouse events only record the latest cursor position. The main loop renders
+    at most ``target_fps`` frames per second by restoring and redrawing the overlay regions of a single
+    display buffer and updating the lines of a single histogram figure.
+
+    Args:
+        image_path (str): Path to the image file.
+        window_size (int): Side length of the analyzed window in pixels. Defaults to 11.
+        persistent (bool): Use the coalescing, persistent-figure renderer. Defaults to True.
+        target_fps (float): Maximum number of frames rendered per second in persistent mode. Defaults to 30.
+
+    Returns:
+        Optional[float]: Frames per second delivered while the cursor moved in persistent mode, None otherwise or
+                         if nothing was rendered.
+    """
 
     def plot_histogram(hist_b: ndarray, hist_g: ndarray, hist_r: ndarray) -> None:
         figure()
@@ -24,50 +121,60 @@ def analyze_image(image_path: str) -> None:
         xlim([0, 256])
         show(block=False)
 
-    def mouse_callback(event: int, x: int, y: int, flags: int, param: None) -> None:
-        if event == EVENT_MOUSEMOVE:
-            img_copy = img.copy()
+    def draw_overlays(target: OverlayCanvas, x: int, y: int) -> ndarray:
+        # Draw the outer border of the window
+        half = window_size // 2
+        target.rectangle((x - half, y - half), (x - half + window_size - 1, y - half + window_size - 1),
+                         (128, 128, 128), 1)
+
+        # Get RGB values at the current pixel
+        b, g, r = img[y, x]
+
+        # Calculate intensity value
+        intensity = (int(r) + int(g) + int(b)) / 3
 
-            # Draw the outer border of the 11x11 window
-            rectangle(img_copy, (x - 5, y - 5), (x + 5, y + 5), (128, 128, 128), 1)
+        # Look up mean and standard deviation of the window
+        bounds = stats.window_bounds(x, y, window_size)
+        expectation, stddev = stats.mean_std(*bounds)
 
-            # Get RGB values at the current pixel
-            b, g, r = img[y, x]
+        # Display information
+        target.put_text(f"Pos: ({x}, {y}) RGB: ({r}, {g}, {b})", (10, 30), 0.7, (255, 255, 255), 2)
+        target.put_text(f"Intensity: {intensity:.2f}", (10, img.shape[0] - 10), 0.7, (255, 255, 255), 2)
+        target.put_text(f"Mean: ({expectation[0]:.2f}, {expectation[1]:.2f}, {expectation[2]:.2f})",
+                        (10, img.shape[0] - 40), 0.7, (255, 255, 255), 2)
+        target.put_text(f"StdDev: ({stddev[0]:.2f}, {stddev[1]:.2f}, {stddev[2]:.2f})",
+                        (10, img.shape[0] - 70), 0.7, (255, 255, 255), 2)
 
-            # Calculate intensity value
-            intensity = (int(r) + int(g) + int(b)) / 3
+        # Look up histogram of the window
+        return stats.histograms(*bounds)
 
-            # Calculate mean and standard deviation of the 11x11 window
-            window = img[max(0, y - 5):min(img.shape[0], y + 6), max(0, x - 5):min(img.shape[1], x + 6)]
-            expectation = mean(window)[:3]  # Get only BGR values
-            stddev = meanStdDev(window)[1][:3]  # Get only BGR values
+    def mouse_callback(event: int, x: int, y: int, flags: int, param: None) -> None:
+        if event != EVENT_MOUSEMOVE or not (0 <= x < img.shape[1] and 0 <= y < img.shape[0]):
+            return
 
-            # Calculate histogram of the window
-            hist_b, hist_g, hist_r = calculate_histogram(window)
+        if persistent:
+            # Only remember the latest position, the main loop renders it
+            pending[0] = (x, y)
+            return
 
-            # Display information
-            putText(img_copy, f"Pos: ({x}, {y}) RGB: ({r}, {g}, {b})", (10, 30),
-                    FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            putText(img_copy, f"Intensity: {intensity:.2f}", (10, img.shape[0] - 10),
-                    FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            putText(img_copy, f"Mean: ({expectation[0]:.2f}, {expectation[1]:.2f}, {expectation[2]:.2f})",
-                    (10, img.shape[0] - 40),
-                    FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            putText(img_copy, f"StdDev: ({stddev[0][0]:.2f}, {stddev[1][0]:.2f}, {stddev[2][0]:.2f})",
-                    (10, img.shape[0] - 70),
-                    FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        overlay = OverlayCanvas(img)
+        hist_b, hist_g, hist_r = draw_overlays(overlay, x, y)
 
-            # Show the image with information
-            imshow("Image Analysis", img_copy)
+        # Show the image with information
+        imshow("Image Analysis", overlay.canvas)
 
-            # Plot histogram
-            plot_histogram(hist_b, hist_g, hist_r)
+        # Plot histogram
+        plot_histogram(hist_b, hist_g, hist_r)
 
     # Read the image
     img = imread(image_path)
     if img is None:
         raise ValueError(f"Unable to read image from {image_path}")
 
+    # Precompute the window statistics once for the whole image
+    stats = WindowStats(img)
+    pending: List[Optional[Tuple[int, int]]] = [None]
+
     # Create a window and set the callback
     namedWindow("Image Analysis")
     setMouseCallback("Image Analysis", mouse_callback)
@@ -75,16 +182,65 @@ def analyze_image(image_path: str) -> None:
     # Display the image
     imshow("Image Analysis", img)
 
-    # Wait for a key press
-    waitKey(0)
+    fps = None
+    if persistent:
+        fps = _render_loop(img, pending, draw_overlays, target_fps)
+    else:
+        # Wait for a key press
+        waitKey(0)
+
     destroyAllWindows()
     close('all')
+    return fps
+
+
+def _render_loop(img: ndarray, pending: List[Optional[Tuple[int, int]]],
+                 draw_overlays: Callable[[OverlayCanvas, int, int], ndarray], target_fps: float) -> Optional[float]:
+    """
+    Render the latest pending cursor position at most ``target_fps`` times per second until a key is pressed.
+
+    Returns:
+        Optional[float]: Frames per second delivered while the cursor moved, counting the rendering and frame
+                         wait of rendered frames only so that idle time does not lower it, or None if no frame
+                         was rendered.
+    """
+    overlay = OverlayCanvas(img)
+    histogram_figure = HistogramFigure()
+    frame_interval = 1.0 / target_fps
+    frames = 0
+    busy_time = 0.0
+
+    while True:
+        start = perf_counter()
+        position = pending[0]
+        if position is not None:
+            # Every mouse event since the last frame collapses into this one
+            pending[0] = None
+            overlay.restore()
+            hist_b, hist_g, hist_r = draw_overlays(overlay, *position)
+            imshow("Image Analysis", overlay.canvas)
+            histogram_figure.update(hist_b, hist_g, hist_r)
+
+        # Sleep for the remainder of the frame while listening for a key press
+        remaining = frame_interval - (perf_counter() - start)
+        key = waitKey(max(1, int(remaining * 1000)))
+        if position is not None:
+            frames += 1
+            busy_time += perf_counter() - start
+        if key != -1:
+            break
+
+    if frames == 0:
+        return None
+    return frames / busy_time
 
 
 def main() -> None:
     image_path = "../../data/img.png"
     try:
-        analyze_image(image_path)
+        fps = analyze_image(image_path)
+        if fps is not None:
+            print(f"Achieved {fps:.1f} FPS")
     except ValueError as e:
         print(f"Error: {e}")
 
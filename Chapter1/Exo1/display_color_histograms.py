@@ -1,6 +1,130 @@
-from cv2 import split, imshow, waitKey, calcHist, destroyAllWindows, imread
+from typing import Iterable, List, Optional, Tuple
+
+from cv2 import imshow, waitKey, calcHist, destroyAllWindows, imread
 from matplotlib.pyplot import tight_layout, show, subplots
-from numpy import ndarray
+from numpy import ndarray, zeros, zeros_like, float64
+
+
+def compute_color_histograms(image: ndarray, bins: int = 256) -> ndarray:
+    """
+    Compute the histograms of all color channels of an 8-bit image without splitting it.
+
+    Each channel is histogrammed directly from the interleaved image, which avoids the
+    per-channel copies made by ``split``.
+
+    Args:
+        image (np.ndarray): Input 8-bit image, single channel or multichannel (e.g. BGR).
+        bins (int): Number of bins covering the range [0, 256). Defaults to 256.
+
+    Returns:
+        np.ndarray: Array of shape (C, bins) holding the histogram of each channel.
+    """
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    histograms = zeros((channels, bins), dtype=float64)
+    for c in range(channels):
+        histograms[c] = calcHist([image], [c], None, [bins], [0, 256]).ravel()
+    return histograms
+
+
+def compute_joint_color_histogram(image: ndarray, bins_per_channel: int = 8) -> ndarray:
+    """
+    Compute the quantized joint 3D color histogram of a 3-channel 8-bit image.
+
+    Args:
+        image (np.ndarray): Input 8-bit image with three channels (e.g. BGR).
+        bins_per_channel (int): Number of quantization levels per channel. Defaults to 8.
+
+    Returns:
+        np.ndarray: Array of shape (bins, bins, bins) indexed by the quantized channel values.
+    """
+    if image.ndim != 3 or image.shape[2] != 3:
+        raise ValueError("The joint color histogram requires a 3-channel image")
+
+    bins = [bins_per_channel] * 3
+    return calcHist([image], [0, 1, 2], None, bins, [0, 256] * 3).astype(float64)
+
+
+class ColorHistogramAccumulator:
+    """
+    Running per-channel and joint color histograms over a stream of images.
+
+    Only the aggregate histograms are stored, so memory does not grow with the number of images.
+    """
+
+    def __init__(self, bins: int = 256, joint_bins: Optional[int] = None):
+        """
+        Args:
+            bins (int): Number of bins of the per-channel histograms. Defaults to 256.
+            joint_bins (Optional[int]): Quantization levels per channel of the joint 3D histogram,
+                                        or None to skip it. Defaults to None.
+        """
+        self.bins = bins
+        self.joint_bins = joint_bins
+        self.num_images = 0
+        self.channel_histograms: Optional[ndarray] = None
+        self.joint_histogram: Optional[ndarray] = None
+
+    def add(self, image: ndarray) -> Tuple[ndarray, Optional[ndarray]]:
+        """
+        Histogram one image and add it to the aggregate.
+
+        Args:
+            image (np.ndarray): Input 8-bit image.
+
+        Returns:
+            Tuple[np.ndarray, Optional[np.ndarray]]: Per-channel and joint histograms of the image.
+        """
+        channel_histograms = compute_color_histograms(image, self.bins)
+        if self.channel_histograms is None:
+            self.channel_histograms = zeros_like(channel_histograms)
+        elif self.channel_histograms.shape != channel_histograms.shape:
+            raise ValueError("All images must have the same number of channels")
+        self.channel_histograms += channel_histograms
+
+        joint_histogram = None
+        if self.joint_bins is not None:
+            joint_histogram = compute_joint_color_histogram(image, self.joint_bins)
+            if self.joint_histogram is None:
+                self.joint_histogram = zeros_like(joint_histogram)
+            self.joint_histogram += joint_histogram
+
+        self.num_images += 1
+        return channel_histograms, joint_histogram
+
+
+def compute_batch_color_histograms(
+        images: Iterable[ndarray],
+        bins: int = 256,
+        joint_bins: Optional[int] = None,
+        keep_per_image: bool = True
+) -> Tuple[List[ndarray], ndarray, Optional[ndarray]]:
+    """
+    Compute per-image and aggregate color histograms over a batch or iterator of images.
+
+    Images are consumed one at a time, so an iterator keeps memory bounded by the histograms.
+
+    Args:
+        images (Iterable[np.ndarray]): 8-bit images with the same number of channels.
+        bins (int): Number of bins of the per-channel histograms. Defaults to 256.
+        joint_bins (Optional[int]): Quantization levels per channel of the aggregate joint 3D histogram,
+                                    or None to skip it. Defaults to None.
+        keep_per_image (bool): Keep the per-channel histograms of every image. Defaults to True.
+
+    Returns:
+        Tuple[List[np.ndarray], np.ndarray, Optional[np.ndarray]]: Per-image (C, bins) histograms
+        (empty if not kept), aggregate (C, bins) histograms and aggregate joint histogram (or None).
+    """
+    accumulator = ColorHistogramAccumulator(bins, joint_bins)
+    per_image = []
+    for image in images:
+        channel_histograms, _ = accumulator.add(image)
+        if keep_per_image:
+            per_image.append(channel_histograms)
+
+    if accumulator.channel_histograms is None:
+        raise ValueError("No images were given")
+
+    return per_image, accumulator.channel_histograms, accumulator.joint_histogram
 
 
 def display_color_histograms(image: ndarray) -> None:
@@ -10,21 +134,19 @@ def display_color_histograms(image: ndarray) -> None:
     Args:
         image (np.ndarray): Input image in BGR format.
     """
-    # Split the image into its color channels
-    blue, green, red = split(image)
+    # Compute the histograms of all channels at once
+    histograms = compute_color_histograms(image)
 
     # Create a figure with 3 subplots
     fig, axs = subplots(1, 3, figsize=(15, 5))
     fig.suptitle('Color Channel Histograms')
 
-    # List of colors, channel names, and corresponding image channels
+    # List of colors and channel names
     colors = ['b', 'g', 'r']
     channel_names = ['Blue', 'Green', 'Red']
-    channels = [blue, green, red]
 
-    # Calculate and plot histogram for each channel
-    for i, (color, name, channel) in enumerate(zip(colors, channel_names, channels)):
-        hist = calcHist([channel], [0], None, [256], [0, 256])
+    # Plot histogram for each channel
+    for i, (color, name, hist) in enumerate(zip(colors, channel_names, histograms)):
         axs[i].plot(hist, color=color)
         axs[i].set_title(f'{name} Channel')
         axs[i].set_xlabel('Pixel Value')
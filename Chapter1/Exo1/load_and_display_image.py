@@ -1,8 +1,9 @@
 from typing import Tuple
 
-from numpy import uint8
 from cv2 import imshow, waitKey, destroyAllWindows, imread, cvtColor, COLOR_BGR2RGB, IMREAD_UNCHANGED
 
+from Chapter1.Exo1.probe_image import probe_image
+
 
 def load_and_display_image(file_path: str) -> Tuple[bool, str]:
     """
@@ -15,27 +16,33 @@ def load_and_display_image(file_path: str) -> Tuple[bool, str]:
     Tuple[bool, str]: A tuple containing a boolean indicating success (True) or failure (False),
                       and a string message describing the result.
     """
+    read_error = (f"Error: Unable to read the file '{file_path}'. "
+                  f"Please check if the file exists and is in a supported format.")
     try:
+        # Check the format from the file header before decoding any pixel
+        try:
+            info = probe_image(file_path)
+        except (OSError, ValueError):
+            return False, read_error
+
+        if not info.lossless:
+            return False, "Error: The image may not be in a lossless format. Please use PNG, BMP, or TIFF."
+
         # Read the image file
         img = imread(file_path, IMREAD_UNCHANGED)
 
         if img is None:
-            return False, (f"Error: Unable to read the file '{file_path}'. "
-                           f"Please check if the file exists and is in a supported format.")
+            return False, read_error
 
-        # Check if the image is in a lossless format (assuming 8-bit per channel for lossy formats)
-        if img.dtype != uint8 or img.shape[2] == 3:  # 3 channels indicate color image
-            # Convert BGR to RGB color space
-            img_rgb = cvtColor(img, COLOR_BGR2RGB)
+        # Convert BGR to RGB color space
+        img_rgb = cvtColor(img, COLOR_BGR2RGB) if info.channels == 3 else img
 
-            # Display the image
-            imshow("Image", img_rgb)
-            waitKey(0)  # Wait for a key press
-            destroyAllWindows()  # Close the window
+        # Display the image
+        imshow("Image", img_rgb)
+        waitKey(0)  # Wait for a key press
+        destroyAllWindows()  # Close the window
 
-            return True, "Image displayed successfully."
-        else:
-            return False, "Error: The image may not be in a lossless format. Please use PNG, BMP, or TIFF."
+        return True, "Image displayed successfully."
 
     except Exception as e:
         return False, f"Error: An unexpected error occurred: {str(e)}"
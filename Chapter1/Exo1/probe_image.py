@@ -0,0 +1,221 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from struct import unpack, error as StructError
+from typing import BinaryIO, Dict, NamedTuple, Optional, Tuple
+
+
+class ImageInfo(NamedTuple):
+    """
+    Image properties read from a file header.
+    """
+    format: str
+    width: int
+    height: int
+    channels: int
+    bit_depth: int
+    lossless: bool
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Channels of each PNG color type (grey, RGB, palette, grey + alpha, RGBA)
+PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+# BMP compression methods that embed JPEG data
+BMP_LOSSY_COMPRESSIONS = {4}
+
+# TIFF compression schemes based on JPEG
+TIFF_LOSSY_COMPRESSIONS = {6, 7, 34892}
+
+# JPEG start-of-frame markers of the lossless processes
+JPEG_LOSSLESS_MARKERS = {0xC3, 0xC7, 0xCB, 0xCF}
+
+
+def probe_image(file_path: str) -> ImageInfo:
+    """
+    Read the dimensions, channels, bit depth and compression of an image from its header only.
+
+    Supports PNG, BMP, TIFF (including BigTIFF) and JPEG. No pixel data is decoded.
+
+    Args:
+    file_path (str): The path to the image file.
+
+    Returns:
+    ImageInfo: The properties of the image.
+
+    Raises:
+    ValueError: If the file is not a supported image or its header is corrupt.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(8)
+        try:
+            if head.startswith(PNG_SIGNATURE):
+                return _probe_png(f)
+            if head.startswith(b'BM'):
+                return _probe_bmp(f)
+            if head[:4] in (b'II*\x00', b'MM\x00*', b'II+\x00', b'MM\x00+'):
+                return _probe_tiff(f, head)
+            if head.startswith(b'\xff\xd8'):
+                return _probe_jpeg(f)
+        except StructError:
+            raise ValueError(f"Truncated image header in '{file_path}'")
+
+    raise ValueError(f"Unsupported image format in '{file_path}'")
+
+
+def _probe_png(f: BinaryIO) -> ImageInfo:
+    length, chunk_type = unpack('>I4s', f.read(8))
+    if chunk_type != b'IHDR':
+        raise ValueError("PNG file does not start with an IHDR chunk")
+
+    width, height, bit_depth, color_type = unpack('>IIBB', f.read(10))
+    if color_type not in PNG_CHANNELS:
+        raise ValueError(f"Invalid PNG color type {color_type}")
+
+    # Palette entries are always 8-bit samples, whatever the index depth
+    if color_type == 3:
+        bit_depth = 8
+    return ImageInfo('PNG', width, height, PNG_CHANNELS[color_type], bit_depth, True)
+
+
+def _probe_bmp(f: BinaryIO) -> ImageInfo:
+    f.seek(14)
+    header_size, = unpack('<I', f.read(4))
+    if header_size == 12:
+        width, height, _, bits_per_pixel = unpack('<HHHH', f.read(8))
+        compression, colors_used, entry_size = 0, 0, 3
+    else:
+        width, height, _, bits_per_pixel, compression, _, _, _, colors_used = unpack('<iiHHIIiiI', f.read(32))
+        entry_size = 4
+
+    if bits_per_pixel == 32:
+        channels, bit_depth = 4, 8
+    elif bits_per_pixel == 16:
+        channels, bit_depth = 3, 5
+    elif bits_per_pixel == 24:
+        channels, bit_depth = 3, 8
+    else:
+        # Palette indices expand to 8-bit BGR, or to grey when every palette entry is grey
+        f.seek(14 + header_size)
+        palette = f.read((colors_used or 1 << bits_per_pixel) * entry_size)
+        entries = [palette[i:i + 3] for i in range(0, len(palette), entry_size)]
+        channels = 1 if all(b == g == r for b, g, r in entries) else 3
+        bit_depth = 8
+
+    return ImageInfo('BMP', abs(width), abs(height), channels, bit_depth, compression not in BMP_LOSSY_COMPRESSIONS)
+
+
+def _probe_tiff(f: BinaryIO, head: bytes) -> ImageInfo:
+    order = '<' if head[:2] == b'II' else '>'
+    big = head[2:4] in (b'+\x00', b'\x00+')
+
+    if big:
+        f.seek(8)
+        ifd_offset, = unpack(order + 'Q', f.read(8))
+        count_format, entry_format, entry_size = 'Q', 'HHQ8s', 20
+    else:
+        ifd_offset, = unpack(order + 'I', head[4:8])
+        count_format, entry_format, entry_size = 'H', 'HHI4s', 12
+
+    f.seek(ifd_offset)
+    count_size = 8 if big else 2
+    num_entries, = unpack(order + count_format, f.read(count_size))
+    entries = f.read(num_entries * entry_size)
+
+    # Sizes of the TIFF field types (BYTE, ASCII, SHORT, LONG, ..., LONG8)
+    type_sizes = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8, 16: 8}
+    type_formats = {1: 'B', 3: 'H', 4: 'I', 16: 'Q'}
+
+    tags: Dict[int, Tuple[int, int]] = {}
+    for i in range(num_entries):
+        tag, field_type, value_count, value = unpack(order + entry_format, entries[i * entry_size:(i + 1) * entry_size])
+        if field_type not in type_formats:
+            continue
+
+        # Only the first value matters, it is inline unless all values overflow the entry
+        if value_count * type_sizes[field_type] > len(value):
+            pointer, = unpack(order + ('Q' if big else 'I'), value)
+            position = f.tell()
+            f.seek(pointer)
+            value = f.read(type_sizes[field_type])
+            f.seek(position)
+        first, = unpack(order + type_formats[field_type], value[:type_sizes[field_type]])
+        tags[tag] = (first, value_count)
+
+    if 256 not in tags or 257 not in tags:
+        raise ValueError("TIFF file has no image dimensions")
+
+    bit_depth = tags.get(258, (1, 1))[0]
+    channels = tags.get(277, (1, 1))[0]
+    compression = tags.get(259, (1, 1))[0]
+    return ImageInfo('TIFF', tags[256][0], tags[257][0], channels, bit_depth,
+                     compression not in TIFF_LOSSY_COMPRESSIONS)
+
+
+def _probe_jpeg(f: BinaryIO) -> ImageInfo:
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if not byte:
+            raise ValueError("JPEG file has no frame header")
+        if byte != b'\xff':
+            continue
+
+        # Skip fill bytes before the marker code
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        code = marker[0] if marker else 0
+
+        # Standalone markers carry no segment
+        if code in (0x00, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            raise ValueError("JPEG file has no frame header")
+
+        length, = unpack('>H', f.read(2))
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            precision, height, width, channels = unpack('>BHHB', f.read(6))
+            return ImageInfo('JPEG', width, height, channels, precision, code in JPEG_LOSSLESS_MARKERS)
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def probe_directory(
+        directory: str,
+        recursive: bool = False,
+        max_workers: Optional[int] = None
+) -> Tuple[Dict[str, ImageInfo], Dict[str, str]]:
+    """
+    Probe the headers of every file in a directory.
+
+    Args:
+    directory (str): Path to the directory to scan.
+    recursive (bool): Also scan subdirectories. Defaults to False.
+    max_workers (Optional[int]): Number of threads reading headers, or None for the executor default.
+
+    Returns:
+    Tuple[Dict[str, ImageInfo], Dict[str, str]]: Properties of the valid images and error messages of the
+                                                 other files, both keyed by path.
+    """
+    if recursive:
+        paths = [os.path.join(root, name) for root, _, names in os.walk(directory) for name in names]
+    else:
+        paths = [entry.path for entry in os.scandir(directory) if entry.is_file()]
+    paths.sort()
+
+    def probe(path: str) -> Tuple[str, Optional[ImageInfo], Optional[str]]:
+        try:
+            return path, probe_image(path), None
+        except (OSError, ValueError) as e:
+            return path, None, str(e)
+
+    infos = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, info, error in executor.map(probe, paths):
+            if info is not None:
+                infos[path] = info
+            else:
+                errors[path] = error
+
+    return infos, errors
@@ -0,0 +1,228 @@
+from math import ceil, sqrt as math_sqrt
+from typing import Optional, Tuple
+
+from cv2 import integral2, CV_64F
+from numpy import ndarray, zeros, bincount, arange, sqrt, maximum, searchsorted, array, int32, int64, float32, uint8, \
+    intp
+
+# Default grid of the integral histogram: blocks of 16 pixels, enlarged on big images to stay within this many blocks
+_DEFAULT_BLOCK_SIZE = 16
+_MAX_GRID_BLOCKS = 1 << 14
+
+# Number of block rows of the integral histogram binned at once
+_BAND_BLOCK_ROWS = 16
+
+
+class WindowStats:
+    """
+    Precomputed statistics of an image that answer rectangular window queries in constant time.
+
+    Mean and standard deviation come from summed-area tables of the pixel values and their squares.
+    Per-channel histograms come from an integral histogram sampled on a grid of ``block_size`` pixels:
+    the grid-aligned interior of a window is answered in O(bins) from the table, and only the thin
+    border strips that do not line up with the grid are counted directly.
+    """
+
+    def __init__(self, image: ndarray, bins: int = 256, block_size: Optional[int] = None):
+        """
+        Build the summed-area tables and the integral histogram of an image.
+
+        Args:
+            image (np.ndarray): Input 8-bit image, either single channel or multichannel (e.g. BGR).
+            bins (int): Number of histogram bins covering the range [0, 256). Defaults to 256.
+            block_size (Optional[int]): Grid step of the integral histogram in pixels, or None for 16 pixels,
+                                        enlarged so that the grid has at most 16384 blocks on large images
+                                        (e.g. 56 pixels and 50 MB of counts for an 8192x6144 BGR image).
+                                        Defaults to None.
+        """
+        if image.dtype != uint8:
+            raise ValueError("WindowStats only supports 8-bit images")
+        if not 1 <= bins <= 256:
+            raise ValueError("bins must be between 1 and 256")
+        if block_size is not None and block_size < 1:
+            raise ValueError("block_size must be positive")
+
+        if image.ndim == 2:
+            image = image[:, :, None]
+
+        self.height, self.width, self.channels = image.shape
+        if block_size is None:
+            block_size = max(_DEFAULT_BLOCK_SIZE, ceil(math_sqrt(self.height * self.width / _MAX_GRID_BLOCKS)))
+        self.bins = bins
+        self.block_size = block_size
+
+        # Quantize pixel values to histogram bins once
+        self._binned = image if bins == 256 else (image.astype(intp) * bins // 256).astype(uint8)
+
+        # Summed-area tables of values and squared values, shape (H + 1, W + 1, C)
+        sums, squares = integral2(image, sdepth=CV_64F, sqdepth=CV_64F)
+        self._sum = sums.reshape(self.height + 1, self.width + 1, self.channels)
+        self._sqsum = squares.reshape(self.height + 1, self.width + 1, self.channels)
+
+        # Grid edges of the integral histogram, the image border is always an edge
+        self._row_edges = _grid_edges(self.height, block_size)
+        self._col_edges = _grid_edges(self.width, block_size)
+        self._hist = self._build_integral_histogram()
+
+    def _build_integral_histogram(self) -> ndarray:
+        """
+        Compute the integral histogram at the grid edges with one bincount per channel and band of block rows.
+
+        Counts are stored in 32 bits, which holds images of up to 2^31 pixels, and the bincount offsets
+        only span one band, so the temporaries stay a fraction of the table.
+
+        Returns:
+            np.ndarray: Array of shape (rows + 1, cols + 1, C, bins) of cumulative counts.
+        """
+        n_rows = len(self._row_edges) - 1
+        n_cols = len(self._col_edges) - 1
+        block_cols = arange(self.width, dtype=intp) // self.block_size
+        dtype = int32 if self.height * self.width < 2 ** 31 else int64
+
+        hist = zeros((n_rows + 1, n_cols + 1, self.channels, self.bins), dtype=dtype)
+        for first in range(0, n_rows, _BAND_BLOCK_ROWS):
+            last = min(first + _BAND_BLOCK_ROWS, n_rows)
+            y0, y1 = self._row_edges[first], self._row_edges[last]
+            band_size = (last - first) * n_cols * self.bins
+
+            # Offset of the (block row, block col) histogram of every pixel of the band
+            block_rows = arange(y1 - y0, dtype=intp) // self.block_size
+            offset = (block_rows[:, None] * n_cols + block_cols[None, :]) * self.bins
+
+            for c in range(self.channels):
+                counts = bincount((offset + self._binned[y0:y1, :, c]).ravel(), minlength=band_size)
+                band = counts.astype(dtype).reshape(last - first, n_cols, self.bins)
+                band.cumsum(axis=1, out=band)
+                band.cumsum(axis=0, out=band)
+                band += hist[first, 1:, c]
+                hist[first + 1:last + 1, 1:, c] = band
+        return hist
+
+    def window_bounds(self, x: int, y: int, window_size: int) -> Tuple[int, int, int, int]:
+        """
+        Get the bounds of a square window centered on a pixel, clipped to the image.
+
+        Args:
+            x (int): Column of the center pixel.
+            y (int): Row of the center pixel.
+            window_size (int): Side length of the window in pixels.
+
+        Returns:
+            Tuple[int, int, int, int]: Half-open bounds (x0, y0, x1, y1).
+        """
+        half = window_size // 2
+        x0 = max(0, x - half)
+        y0 = max(0, y - half)
+        x1 = min(self.width, x - half + window_size)
+        y1 = min(self.height, y - half + window_size)
+        return x0, y0, x1, y1
+
+    def _box(self, table: ndarray, x0: int, y0: int, x1: int, y1: int) -> ndarray:
+        return table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+
+    def mean(self, x0: int, y0: int, x1: int, y1: int) -> ndarray:
+        """
+        Get the per-channel mean of a rectangle in constant time.
+
+        Args:
+            x0 (int): First column of the rectangle.
+            y0 (int): First row of the rectangle.
+            x1 (int): Column past the end of the rectangle.
+            y1 (int): Row past the end of the rectangle.
+
+        Returns:
+            np.ndarray: Mean of each channel.
+        """
+        return self.mean_std(x0, y0, x1, y1)[0]
+
+    def std(self, x0: int, y0: int, x1: int, y1: int) -> ndarray:
+        """
+        Get the per-channel standard deviation of a rectangle in constant time.
+
+        Args:
+            x0 (int): First column of the rectangle.
+            y0 (int): First row of the rectangle.
+            x1 (int): Column past the end of the rectangle.
+            y1 (int): Row past the end of the rectangle.
+
+        Returns:
+            np.ndarray: Standard deviation of each channel.
+        """
+        return self.mean_std(x0, y0, x1, y1)[1]
+
+    def mean_std(self, x0: int, y0: int, x1: int, y1: int) -> Tuple[ndarray, ndarray]:
+        """
+        Get the per-channel mean and standard deviation of a rectangle in constant time.
+
+        Args:
+            x0 (int): First column of the rectangle.
+            y0 (int): First row of the rectangle.
+            x1 (int): Column past the end of the rectangle.
+            y1 (int): Row past the end of the rectangle.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Mean and standard deviation of each channel.
+        """
+        area = (x1 - x0) * (y1 - y0)
+        if area <= 0:
+            raise ValueError("The rectangle is empty")
+
+        expectation = self._box(self._sum, x0, y0, x1, y1) / area
+        variance = self._box(self._sqsum, x0, y0, x1, y1) / area - expectation ** 2
+        return expectation, sqrt(maximum(variance, 0))
+
+    def histograms(self, x0: int, y0: int, x1: int, y1: int) -> ndarray:
+        """
+        Get the per-channel histograms of a rectangle.
+
+        The grid-aligned interior is read from the integral histogram in O(bins), and the pixels
+        of the remaining border strips (less than ``block_size`` wide) are counted directly.
+
+        Args:
+            x0 (int): First column of the rectangle.
+            y0 (int): First row of the rectangle.
+            x1 (int): Column past the end of the rectangle.
+            y1 (int): Row past the end of the rectangle.
+
+        Returns:
+            np.ndarray: Array of shape (C, bins) holding the histogram of each channel.
+        """
+        if x1 <= x0 or y1 <= y0:
+            raise ValueError("The rectangle is empty")
+
+        # Innermost grid edges enclosed by the rectangle
+        gy0 = searchsorted(self._row_edges, y0, side='left')
+        gy1 = searchsorted(self._row_edges, y1, side='right') - 1
+        gx0 = searchsorted(self._col_edges, x0, side='left')
+        gx1 = searchsorted(self._col_edges, x1, side='right') - 1
+
+        if gy0 >= gy1 or gx0 >= gx1:
+            return self._count(x0, y0, x1, y1).astype(float32)
+
+        iy0, iy1 = self._row_edges[gy0], self._row_edges[gy1]
+        ix0, ix1 = self._col_edges[gx0], self._col_edges[gx1]
+
+        hist = self._box(self._hist, gx0, gy0, gx1, gy1)
+        hist += self._count(x0, y0, x1, iy0)  # Top strip
+        hist += self._count(x0, iy1, x1, y1)  # Bottom strip
+        hist += self._count(x0, iy0, ix0, iy1)  # Left strip
+        hist += self._count(ix1, iy0, x1, iy1)  # Right strip
+        return hist.astype(float32)
+
+    def _count(self, x0: int, y0: int, x1: int, y1: int) -> ndarray:
+        """
+        Count the binned pixel values of a rectangle directly.
+        """
+        if x1 <= x0 or y1 <= y0:
+            return zeros((self.channels, self.bins), dtype=int64)
+
+        window = self._binned[y0:y1, x0:x1].reshape(-1, self.channels).astype(intp)
+        index = window + arange(self.channels) * self.bins
+        return bincount(index.ravel(), minlength=self.channels * self.bins).reshape(self.channels, self.bins)
+
+
+def _grid_edges(length: int, step: int) -> ndarray:
+    """
+    Get the grid edges 0, step, 2 * step, ... along an axis, always ending with the axis length.
+    """
+    return array(list(range(0, length, step)) + [length])
@@ -0,0 +1,60 @@
+from os import cpu_count
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from numpy import array_equal
+
+from Chapter1.Exo2.read_image_sequence import read_image_sequence
+
+
+def benchmark_read_image_sequence(
+        directory: str,
+        num_frames: int = 50,
+        workers: Optional[List[int]] = None,
+        repeats: int = 5
+) -> Dict[int, float]:
+    """
+    Time serial and thread-pool decoding of an image sequence.
+
+    Args:
+    directory (str): Path to the directory containing the image sequence.
+    num_frames (int): Number of frames to read. Defaults to 50.
+    workers (Optional[List[int]]): Worker counts to time. Defaults to 1, 2, 4 and the CPU count.
+    repeats (int): Number of runs per worker count, the best one is kept. Defaults to 5.
+
+    Returns:
+    Dict[int, float]: Best wall time in seconds for each worker count.
+    """
+    if workers is None:
+        workers = sorted({1, 2, 4, cpu_count() or 1})
+
+    reference = read_image_sequence(directory, num_frames)
+    timings = {}
+    for max_workers in workers:
+        best = float('inf')
+        for _ in range(repeats):
+            start = perf_counter()
+            images = read_image_sequence(directory, num_frames, max_workers=max_workers)
+            best = min(best, perf_counter() - start)
+
+        # The parallel path must return the same frames in the same order
+        if not all(array_equal(a, b) for a, b in zip(reference, images)):
+            raise RuntimeError(f"Frames decoded with {max_workers} workers differ from the serial path")
+        timings[max_workers] = best
+
+    return timings
+
+
+def main():
+    try:
+        timings = benchmark_read_image_sequence("../../gif", num_frames=50)
+        serial = timings[1]
+        for max_workers, elapsed in timings.items():
+            print(f"{max_workers:3d} workers: {elapsed * 1000:8.2f} ms  ({serial / elapsed:.2f}x)")
+
+    except ValueError as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
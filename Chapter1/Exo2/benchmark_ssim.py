@@ -0,0 +1,61 @@
+from time import perf_counter
+from typing import List, Tuple
+
+from cv2 import cvtColor, COLOR_BGR2GRAY
+from numpy import ndarray
+from skimage.metrics import structural_similarity as ssim
+
+from Chapter1.Exo2.fast_ssim import local_moments, ssim_from_moments
+from Chapter1.Exo2.read_image_sequence import read_image_sequence
+
+
+def benchmark_ssim(images: List[ndarray], tolerance: float = 1e-4) -> Tuple[float, float, float]:
+    """
+    Validate the fast SSIM against scikit-image on consecutive frame pairs and time both.
+
+    Args:
+    images (List[np.ndarray]): List of images as numpy arrays.
+    tolerance (float): Maximum allowed absolute difference per pair. Defaults to 1e-4.
+
+    Returns:
+    Tuple[float, float, float]: Maximum absolute difference, scikit-image time and fast time in seconds.
+
+    Raises:
+    ValueError: If a pair differs by more than the tolerance.
+    """
+    grays = [cvtColor(img, COLOR_BGR2GRAY) for img in images]
+
+    start = perf_counter()
+    reference = [ssim(prev_gray, gray, full=True)[0] for prev_gray, gray in zip(grays, grays[1:])]
+    skimage_time = perf_counter() - start
+
+    start = perf_counter()
+    fast = []
+    prev_moments = local_moments(grays[0])
+    for gray in grays[1:]:
+        moments = local_moments(gray)
+        fast.append(ssim_from_moments(prev_moments, moments))
+        prev_moments = moments
+    fast_time = perf_counter() - start
+
+    max_difference = max(abs(a - b) for a, b in zip(reference, fast))
+    if max_difference > tolerance:
+        raise ValueError(f"Fast SSIM differs from scikit-image by {max_difference:.2e}")
+
+    return max_difference, skimage_time, fast_time
+
+
+def main():
+    try:
+        image_sequence = read_image_sequence("../../gif", num_frames=50)
+        max_difference, skimage_time, fast_time = benchmark_ssim(image_sequence)
+        print(f"Max |SSIM difference|: {max_difference:.2e}")
+        print(f"scikit-image: {skimage_time * 1000:.1f} ms")
+        print(f"Fast SSIM:    {fast_time * 1000:.1f} ms  ({skimage_time / fast_time:.1f}x)")
+
+    except ValueError as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
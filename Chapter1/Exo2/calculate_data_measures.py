@@ -1,54 +1,117 @@
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Iterator, Tuple
 
-from cv2 import cartToPolar, cvtColor, COLOR_BGR2GRAY, absdiff, calcOpticalFlowFarneback
+from cv2 import cvtColor, COLOR_BGR2GRAY
 from numpy import std, mean, ndarray
-from skimage.metrics import structural_similarity as ssim
 
+from Chapter1.Exo2.measure_registry import MEASURES, DEFAULT_MEASURES, SKIMAGE_SSIM, Measure, PairIntermediates
 from Chapter1.Exo2.read_image_sequence import read_image_sequence, process_image_sequence
 
 
-def calculate_data_measures(images: List[ndarray]) -> Dict[str, List[float]]:
+def calculate_data_measures(
+        images: Iterable[ndarray],
+        fast_ssim: bool = True,
+        measures: Optional[Iterable[str]] = None
+) -> Dict[str, List[float]]:
     """
-    Calculate three data measures for the image sequence:
+    Calculate data measures for the image sequence, by default:
     1. Temporal Gradient Magnitude
     2. Structural Similarity Index (SSIM)
     3. Optical Flow Magnitude
 
+    Only the previous grayscale frame is kept between iterations, so streamed frames are measured in constant memory.
+
     Args:
-    images (List[np.ndarray]): List of images as numpy arrays.
+    images (Iterable[np.ndarray]): Images as numpy arrays, e.g. a list or a stream_image_sequence generator.
+    fast_ssim (bool): Compute SSIM with the in-project float32 implementation, reusing each frame's local
+                      moments across its two pairs, instead of scikit-image. Defaults to True.
+    measures (Optional[Iterable[str]]): Names of the registered measures to compute, or None for the
+                                        three measures above. Defaults to None.
 
     Returns:
     Dict[str, List[float]]: Dictionary containing lists of measure values for each frame.
     """
-    temporal_gradient = []
-    structural_similarity = []
-    optical_flow_magnitude = []
+    return calculate_gray_measures((cvtColor(img, COLOR_BGR2GRAY) for img in images), fast_ssim, measures)
 
-    prev_gray = cvtColor(images[0], COLOR_BGR2GRAY)
 
-    for i in range(1, len(images)):
-        gray = cvtColor(images[i], COLOR_BGR2GRAY)
+def calculate_gray_measures(
+        grays: Iterable[ndarray],
+        fast_ssim: bool = True,
+        measures: Optional[Iterable[str]] = None
+) -> Dict[str, List[float]]:
+    """
+    Calculate the data measures of calculate_data_measures on frames already converted to grayscale.
 
-        # Calculate Temporal Gradient Magnitude
-        grad = absdiff(gray, prev_gray)
-        temporal_gradient.append(mean(grad))
+    Every intermediate (frame difference, optical flow, local moments) is computed at most once per
+    frame pair and only if a requested measure needs it, so for instance Farneback flow is skipped
+    unless "Optical Flow Magnitude" is requested.
 
-        # Calculate Structural Similarity Index (SSIM)
-        ssim_value, _ = ssim(prev_gray, gray, full=True)
-        structural_similarity.append(ssim_value)
+    Args:
+    grays (Iterable[np.ndarray]): Grayscale frames.
+    fast_ssim (bool): Compute SSIM with the in-project float32 implementation. Defaults to True.
+    measures (Optional[Iterable[str]]): Names of the registered measures to compute, or None for the
+                                        default measures. Defaults to None.
 
-        # Calculate Optical Flow Magnitude
-        flow = calcOpticalFlowFarneback(prev_gray, gray, None, 0.5, 3, 15, 3, 5, 1.2, 0)
-        magnitude, _ = cartToPolar(flow[..., 0], flow[..., 1])
-        optical_flow_magnitude.append(mean(magnitude))
+    Returns:
+    Dict[str, List[float]]: Dictionary containing lists of measure values for each frame pair.
+    """
+    selected = resolve_measures(measures, fast_ssim)
+    values: Dict[str, List[float]] = {name: [] for name in selected}
 
-        prev_gray = gray
+    for row in iter_gray_measures(grays, selected):
+        for name, value in zip(selected, row):
+            values[name].append(value)
+
+    return values
+
+
+def resolve_measures(measures: Optional[Iterable[str]] = None, fast_ssim: bool = True) -> Dict[str, Measure]:
+    """
+    Look up measures by name in the registry.
+
+    Args:
+    measures (Optional[Iterable[str]]): Names of the registered measures, or None for the default measures.
+    fast_ssim (bool): Use the in-project SSIM rather than scikit-image. Defaults to True.
+
+    Returns:
+    Dict[str, Measure]: The measures in the requested order.
+
+    Raises:
+    ValueError: If a name is not registered.
+    """
+    names = list(DEFAULT_MEASURES if measures is None else measures)
+    unknown = [name for name in names if name not in MEASURES]
+    if unknown:
+        raise ValueError(f"Unknown measures: {', '.join(unknown)}. Available: {', '.join(MEASURES)}")
+
+    selected = {name: MEASURES[name] for name in names}
+    if not fast_ssim and "Structural Similarity Index" in selected:
+        selected["Structural Similarity Index"] = SKIMAGE_SSIM
+    return selected
+
+
+def iter_gray_measures(grays: Iterable[ndarray], selected: Dict[str, Measure]) -> Iterator[Tuple[float, ...]]:
+    """
+    Yield the values of the selected measures for each consecutive pair of grayscale frames.
 
-    return {
-        "Temporal Gradient Magnitude": temporal_gradient,
-        "Structural Similarity Index": structural_similarity,
-        "Optical Flow Magnitude": optical_flow_magnitude
-    }
+    Args:
+    grays (Iterable[np.ndarray]): Grayscale frames.
+    selected (Dict[str, Measure]): Measures to compute, e.g. from resolve_measures.
+
+    Yields:
+    Tuple[float, ...]: Values of the measures of one frame pair, in the order of selected.
+    """
+    frames = iter(grays)
+    prev_gray = next(frames, None)
+    if prev_gray is None:
+        # No frame, hence no pair, like a single frame
+        return
+    intermediates = None
+
+    for gray in frames:
+        intermediates = PairIntermediates(prev_gray, gray, intermediates)
+        yield tuple(intermediates.measure(measure) for measure in selected.values())
+
+        prev_gray = gray
 
 
 def main():
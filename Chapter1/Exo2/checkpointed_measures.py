@@ -0,0 +1,184 @@
+import json
+import os
+from typing import List, Dict, Iterable, Optional, Any, Tuple
+
+from cv2 import cvtColor, COLOR_BGR2GRAY
+from numpy import ndarray, array, float64, load, save, std, mean
+from numpy.lib.format import open_memmap
+
+from Chapter1.Exo2.calculate_data_measures import resolve_measures, iter_gray_measures
+from Chapter1.Exo2.compare_measures_l1 import pairwise_distance_matrix
+from Chapter1.Exo2.read_image_sequence import list_image_files, read_frame
+
+INDEX_FILE = "index.json"
+MEASURES_FILE = "measures.npy"
+
+
+def _write_json(path: str, content: Dict[str, Any]) -> None:
+    with open(path + ".tmp", 'w') as f:
+        json.dump(content, f)
+    os.replace(path + ".tmp", path)
+
+
+def _flush_rows(output_dir: str, index: Dict[str, Any], rows: List[Tuple[float, ...]]) -> None:
+    """
+    Write buffered measure rows as a new chunk file, then record it in the index.
+    """
+    name = f"chunk_{len(index['chunks']):05d}.npy"
+    with open(os.path.join(output_dir, name + ".tmp"), 'wb') as f:
+        save(f, array(rows, dtype=float64))
+    os.replace(os.path.join(output_dir, name + ".tmp"), os.path.join(output_dir, name))
+
+    index["chunks"].append({"file": name, "rows": len(rows)})
+    index["completed_pairs"] += len(rows)
+    _write_json(os.path.join(output_dir, INDEX_FILE), index)
+    rows.clear()
+
+
+def _consolidate(output_dir: str, index: Dict[str, Any]) -> None:
+    """
+    Gather the chunks into one (M, T) array so that every measure is a contiguous, memory-mappable row.
+    """
+    values = open_memmap(os.path.join(output_dir, MEASURES_FILE + ".tmp"), mode='w+', dtype=float64,
+                         shape=(len(index["measures"]), index["completed_pairs"]))
+    start = 0
+    for chunk in index["chunks"]:
+        rows = load(os.path.join(output_dir, chunk["file"]))
+        values[:, start:start + len(rows)] = rows.T
+        start += len(rows)
+    values.flush()
+    del values
+    os.replace(os.path.join(output_dir, MEASURES_FILE + ".tmp"), os.path.join(output_dir, MEASURES_FILE))
+
+    index["consolidated"] = True
+    _write_json(os.path.join(output_dir, INDEX_FILE), index)
+    for chunk in index["chunks"]:
+        os.remove(os.path.join(output_dir, chunk["file"]))
+
+
+def calculate_data_measures_checkpointed(
+        directory: str,
+        output_dir: str,
+        num_frames: int = 50,
+        measures: Optional[Iterable[str]] = None,
+        fast_ssim: bool = True,
+        chunk_rows: int = 64
+) -> Dict[str, ndarray]:
+    """
+    Calculate data measures over a long sequence, appending them to disk as they are computed.
+
+    Every chunk_rows frame pairs, the new measure rows are written as a .npy chunk and recorded in an
+    index. When restarted on the same output directory, the computation resumes after the last recorded
+    pair and only re-decodes the frame before it for context. Once all pairs are done, the chunks are
+    gathered into one (M, T) measures.npy file.
+
+    Args:
+    directory (str): Path to the directory containing the image sequence.
+    output_dir (str): Directory holding the index and measure files.
+    num_frames (int): Number of frames to measure. Defaults to 50.
+    measures (Optional[Iterable[str]]): Names of the registered measures to compute, or None for the
+                                        default measures. Defaults to None.
+    fast_ssim (bool): Compute SSIM with the in-project float32 implementation. Defaults to True.
+    chunk_rows (int): Number of frame pairs per chunk, i.e. the work lost at most on interruption. Defaults to 64.
+
+    Returns:
+    Dict[str, np.ndarray]: Read-only memory-mapped values of each measure, see load_measures.
+
+    Raises:
+    ValueError: If the output directory holds a different computation, or on missing or unreadable frames.
+    """
+    selected = resolve_measures(measures, fast_ssim)
+    image_files = list_image_files(directory, num_frames)
+    os.makedirs(output_dir, exist_ok=True)
+
+    index_path = os.path.join(output_dir, INDEX_FILE)
+    settings = {"files": [os.path.basename(path) for path in image_files], "measures": list(selected),
+                "fast_ssim": fast_ssim}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if {key: index[key] for key in settings} != settings:
+            raise ValueError(f"'{output_dir}' holds measures of another sequence or measure selection")
+    else:
+        index = dict(settings, chunks=[], completed_pairs=0, consolidated=False)
+        _write_json(index_path, index)
+
+    completed = index["completed_pairs"]
+    if completed < len(image_files) - 1:
+        # Frame `completed` is the context of the first missing pair
+        grays = (cvtColor(read_frame(path), COLOR_BGR2GRAY) for path in image_files[completed:])
+        rows: List[Tuple[float, ...]] = []
+        for row in iter_gray_measures(grays, selected):
+            rows.append(row)
+            if len(rows) == chunk_rows:
+                _flush_rows(output_dir, index, rows)
+        if rows:
+            _flush_rows(output_dir, index, rows)
+
+    if not index["consolidated"]:
+        _consolidate(output_dir, index)
+
+    return load_measures(output_dir)
+
+
+def load_measures(output_dir: str) -> Dict[str, ndarray]:
+    """
+    Memory-map the measures written by calculate_data_measures_checkpointed.
+
+    The rows can be given to normalize_measures and compare_measures_l1 like lists, or the whole array
+    (see load_measure_array) to pairwise_distance_matrix, without loading them into memory first.
+
+    Args:
+    output_dir (str): Directory holding the index and measure files.
+
+    Returns:
+    Dict[str, np.ndarray]: Read-only memory-mapped values of each measure.
+    """
+    names, values = load_measure_array(output_dir)
+    return {name: values[i] for i, name in enumerate(names)}
+
+
+def load_measure_array(output_dir: str) -> Tuple[List[str], ndarray]:
+    """
+    Memory-map the (M, T) array of measures written by calculate_data_measures_checkpointed.
+
+    Args:
+    output_dir (str): Directory holding the index and measure files.
+
+    Returns:
+    Tuple[List[str], np.ndarray]: Measure names and the read-only memory-mapped (M, T) array.
+
+    Raises:
+    ValueError: If the computation has not completed yet.
+    """
+    with open(os.path.join(output_dir, INDEX_FILE)) as f:
+        index = json.load(f)
+    if not index["consolidated"]:
+        raise ValueError(f"The measures in '{output_dir}' are not complete yet")
+    return index["measures"], load(os.path.join(output_dir, MEASURES_FILE), mmap_mode='r')
+
+
+def main():
+    try:
+        # Replace with your actual directory paths
+        data_measures = calculate_data_measures_checkpointed("../../gif", "../../measures", num_frames=50)
+        for measure, values in data_measures.items():
+            print(f"\n{measure} statistics:")
+            print(f"  Min: {values.min():.4f}")
+            print(f"  Max: {values.max():.4f}")
+            print(f"  Mean: {mean(values):.4f}")
+            print(f"  Std Dev: {std(values):.4f}")
+
+        names, values = load_measure_array("../../measures")
+        distances = pairwise_distance_matrix(values)
+        print("\nL1 distances between raw measures:")
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                print(f"  {names[i]} vs {names[j]}: {distances[i, j]:.4f}")
+
+    except ValueError as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
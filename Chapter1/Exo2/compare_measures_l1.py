@@ -1,7 +1,7 @@
 from itertools import combinations
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Sequence, Optional
 
-from numpy import std, abs, array, mean, sum
+from numpy import std, abs, mean, sum, ndarray, stack, asarray, float64, zeros, sqrt, outer, diag
 
 from Chapter1.Exo2.calculate_data_measures import calculate_data_measures
 from Chapter1.Exo2.normalize_measures import normalize_measures
@@ -19,7 +19,7 @@ def l1_distance(x: List[float], y: List[float]) -> float:
     Returns:
     float: L1 distance between x and y
     """
-    return sum(abs(array(x) - array(y)))
+    return sum(abs(asarray(x) - asarray(y)))
 
 
 def compare_measures_l1(measures: Dict[str, List[float]]) -> Dict[Tuple[str, str], float]:
@@ -42,6 +42,106 @@ def compare_measures_l1(measures: Dict[str, List[float]]) -> Dict[Tuple[str, str
     return comparisons
 
 
+def stack_measures(measures: Dict[str, Sequence[float]]) -> Tuple[List[str], ndarray]:
+    """
+    Stack measures into a single array, once.
+
+    Args:
+    measures (Dict[str, Sequence[float]]): Dictionary of measures of the same length
+
+    Returns:
+    Tuple[List[str], np.ndarray]: Measure names and the (M, T) array of their values
+    """
+    names = list(measures.keys())
+    return names, stack([asarray(measures[name], dtype=float64) for name in names])
+
+
+def pairwise_distance_matrix(values: ndarray, metric: str = "l1", max_block_elements: int = 1 << 24) -> ndarray:
+    """
+    Compute the M x M matrix of distances between the rows of an (M, T) array.
+
+    The time axis is processed in blocks so that the broadcast (M, M, block) temporaries never exceed
+    max_block_elements, which keeps memory bounded when T is in the millions (the array may be memory-mapped).
+
+    Args:
+    values (np.ndarray): (M, T) array of measures
+    metric (str): "l1", "l2" or "correlation" (1 - Pearson correlation)
+    max_block_elements (int): Maximum number of elements of a broadcast temporary
+
+    Returns:
+    np.ndarray: Symmetric (M, M) distance matrix
+    """
+    if metric not in ("l1", "l2", "correlation"):
+        raise ValueError(f"Unknown metric: {metric}")
+
+    num_measures, length = values.shape
+    block = max(1, max_block_elements // max(1, num_measures * num_measures))
+
+    if metric == "correlation":
+        # Accumulate the sums and the Gram matrix of the centered rows
+        offsets = asarray(values[:, :min(length, block)], dtype=float64).mean(axis=1, keepdims=True)
+        sums = zeros(num_measures)
+        gram = zeros((num_measures, num_measures))
+        for start in range(0, length, block):
+            chunk = asarray(values[:, start:start + block], dtype=float64) - offsets
+            sums += chunk.sum(axis=1)
+            gram += chunk @ chunk.T
+        covariance = gram - outer(sums, sums) / length
+        deviations = sqrt(diag(covariance))
+        deviations[deviations == 0] = 1e-6  # Avoid division by zero
+        return 1 - covariance / outer(deviations, deviations)
+
+    distances = zeros((num_measures, num_measures))
+    for start in range(0, length, block):
+        chunk = asarray(values[:, start:start + block], dtype=float64)
+        differences = chunk[:, None, :] - chunk[None, :, :]
+        if metric == "l1":
+            distances += abs(differences).sum(axis=2)
+        else:
+            distances += (differences * differences).sum(axis=2)
+
+    return distances if metric == "l1" else sqrt(distances)
+
+
+def sliding_distance_matrices(values: ndarray, window: int, step: Optional[int] = None, metric: str = "l1",
+                              max_block_elements: int = 1 << 24) -> ndarray:
+    """
+    Compute the distance matrix of every sliding window along the time axis.
+
+    Args:
+    values (np.ndarray): (M, T) array of measures
+    window (int): Number of time steps per window
+    step (Optional[int]): Offset between consecutive windows, defaults to the window size
+    metric (str): "l1", "l2" or "correlation"
+    max_block_elements (int): Maximum number of elements of a broadcast temporary
+
+    Returns:
+    np.ndarray: (W, M, M) array with the distance matrix of each of the W windows
+    """
+    if step is None:
+        step = window
+    starts = range(0, values.shape[1] - window + 1, step)
+    return stack([
+        pairwise_distance_matrix(values[:, start:start + window], metric, max_block_elements) for start in starts
+    ]) if len(starts) else zeros((0, values.shape[0], values.shape[0]))
+
+
+def compare_measures_matrix(measures: Dict[str, Sequence[float]], metric: str = "l1") -> Dict[Tuple[str, str], float]:
+    """
+    Compare all pairs of measures like compare_measures_l1, from a single distance matrix.
+
+    Args:
+    measures (Dict[str, Sequence[float]]): Dictionary of normalized measures
+    metric (str): "l1", "l2" or "correlation"
+
+    Returns:
+    Dict[Tuple[str, str], float]: Dictionary of distances between each pair of measures
+    """
+    names, values = stack_measures(measures)
+    distances = pairwise_distance_matrix(values, metric)
+    return {(names[i], names[j]): float(distances[i, j]) for i, j in combinations(range(len(names)), 2)}
+
+
 def main():
     try:
         # Replace with your actual directory path
@@ -0,0 +1,121 @@
+from time import perf_counter
+from typing import List, Dict, Iterable, Tuple, Optional
+
+from cv2 import cvtColor, COLOR_BGR2GRAY, pyrDown
+from numpy import ndarray, array, corrcoef, mean
+
+from Chapter1.Exo2.calculate_data_measures import calculate_gray_measures
+from Chapter1.Exo2.read_image_sequence import read_image_sequence
+
+
+def downscale_gray(img: ndarray, levels: int) -> ndarray:
+    """
+    Convert an image to grayscale and go down a number of Gaussian pyramid levels.
+
+    Args:
+    img (np.ndarray): Input BGR image.
+    levels (int): Number of pyramid levels, each halving the resolution.
+
+    Returns:
+    np.ndarray: Downscaled grayscale image.
+    """
+    gray = cvtColor(img, COLOR_BGR2GRAY)
+    for _ in range(levels):
+        gray = pyrDown(gray)
+    return gray
+
+
+def calculate_data_measures_fast(
+        images: Iterable[ndarray],
+        levels: int = 1,
+        stride: int = 1,
+        fast_ssim: bool = True,
+        measures: Optional[Iterable[str]] = None
+) -> Dict[str, List[float]]:
+    """
+    Approximate the data measures of calculate_data_measures on a downscaled pyramid level.
+
+    Only every stride-th frame is measured, so each value describes the pair (k * stride, (k + 1) * stride).
+    Optical flow magnitudes are multiplied by 2 ** levels to get back to full-resolution pixels and
+    divided by the stride to stay in pixels per frame.
+
+    Args:
+    images (Iterable[np.ndarray]): Images as numpy arrays.
+    levels (int): Number of pyramid levels to go down. Defaults to 1.
+    stride (int): Step between measured frames. Defaults to 1.
+    fast_ssim (bool): Compute SSIM with the in-project float32 implementation. Defaults to True.
+    measures (Optional[Iterable[str]]): Names of the registered measures to compute, or None for the
+                                        default measures. Defaults to None.
+
+    Returns:
+    Dict[str, List[float]]: Dictionary containing lists of measure values for each measured frame pair.
+    """
+    if levels < 0 or stride < 1:
+        raise ValueError("levels must be non-negative and stride positive")
+
+    grays = (downscale_gray(img, levels) for i, img in enumerate(images) if i % stride == 0)
+    values = calculate_gray_measures(grays, fast_ssim, measures)
+
+    if "Optical Flow Magnitude" in values:
+        flow_scale = 2 ** levels / stride
+        values["Optical Flow Magnitude"] = [value * flow_scale for value in values["Optical Flow Magnitude"]]
+    return values
+
+
+def accuracy_report(
+        images: List[ndarray],
+        settings: Iterable[Tuple[int, int]] = ((1, 1), (2, 1), (1, 2), (2, 2)),
+        fast_ssim: bool = True
+) -> Dict[Tuple[int, int], Dict[str, float]]:
+    """
+    Compare fast-mode measures with the full-resolution ones for several (levels, stride) settings.
+
+    Each fast value is compared with the mean of the full-resolution values of the pairs it spans.
+
+    Args:
+    images (List[np.ndarray]): List of images as numpy arrays.
+    settings (Iterable[Tuple[int, int]]): (levels, stride) settings to evaluate.
+    fast_ssim (bool): Compute SSIM with the in-project float32 implementation. Defaults to True.
+
+    Returns:
+    Dict[Tuple[int, int], Dict[str, float]]: For each setting, the Pearson correlation of every measure
+                                             with the full-resolution measure, and its "Speedup".
+    """
+    start = perf_counter()
+    full = calculate_data_measures_fast(images, levels=0, stride=1, fast_ssim=fast_ssim)
+    full_time = perf_counter() - start
+
+    report = {}
+    for levels, stride in settings:
+        start = perf_counter()
+        fast = calculate_data_measures_fast(images, levels, stride, fast_ssim)
+        elapsed = perf_counter() - start
+
+        row = {}
+        for name, values in fast.items():
+            reference = [mean(full[name][k * stride:(k + 1) * stride]) for k in range(len(values))]
+            row[name] = float(corrcoef(array(values), array(reference))[0, 1]) if len(values) > 1 else float('nan')
+        row["Speedup"] = full_time / elapsed
+        report[(levels, stride)] = row
+
+    return report
+
+
+def main():
+    try:
+        # Replace with your actual directory path
+        image_sequence = read_image_sequence("../../gif", num_frames=50)
+        print(f"Successfully read {len(image_sequence)} images.")
+
+        report = accuracy_report(image_sequence)
+        for (levels, stride), row in report.items():
+            print(f"\nLevels: {levels}, stride: {stride}, speedup: {row.pop('Speedup'):.1f}x")
+            for measure, correlation in row.items():
+                print(f"  {measure} correlation: {correlation:.4f}")
+
+    except ValueError as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
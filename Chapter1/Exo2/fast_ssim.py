@@ -0,0 +1,117 @@
+from typing import NamedTuple, Optional
+
+from cv2 import boxFilter, GaussianBlur, BORDER_REFLECT, multiply, CV_32F
+from numpy import ndarray, float32, float64
+
+
+class LocalMoments(NamedTuple):
+    """
+    Local statistics of one frame that SSIM needs, shared by the two frame pairs it belongs to.
+    """
+    image: ndarray
+    mean: ndarray
+    variance: ndarray
+    win_size: int
+    sigma: Optional[float]
+
+
+def _local_filter(image: ndarray, win_size: int, sigma: Optional[float]) -> ndarray:
+    if sigma is not None:
+        return GaussianBlur(image, (win_size, win_size), sigma, borderType=BORDER_REFLECT)
+    return boxFilter(image, CV_32F, (win_size, win_size), normalize=True, borderType=BORDER_REFLECT)
+
+
+def local_moments(gray: ndarray, win_size: int = 7, gaussian: bool = False, sigma: float = 1.5) -> LocalMoments:
+    """
+    Compute the local mean and variance of a grayscale frame with separable filters on float32.
+
+    The defaults match scikit-image ``structural_similarity``: a uniform 7x7 window with the sample
+    covariance, or an 11x11 Gaussian window with sigma 1.5 and the population covariance.
+
+    Args:
+    gray (np.ndarray): Grayscale frame.
+    win_size (int): Side of the uniform window, ignored for the Gaussian window. Defaults to 7.
+    gaussian (bool): Use a Gaussian instead of a uniform window. Defaults to False.
+    sigma (float): Standard deviation of the Gaussian window. Defaults to 1.5.
+
+    Returns:
+    LocalMoments: The float32 frame with its local mean and variance.
+    """
+    if gaussian:
+        # Same support as scipy's gaussian_filter with truncate=3.5
+        win_size = 2 * int(3.5 * sigma + 0.5) + 1
+        cov_norm = 1.0
+    else:
+        cov_norm = win_size * win_size / (win_size * win_size - 1)
+
+    window_sigma = sigma if gaussian else None
+    image = gray.astype(float32)
+    mean = _local_filter(image, win_size, window_sigma)
+    variance = _local_filter(multiply(image, image), win_size, window_sigma)
+    variance -= multiply(mean, mean)
+    variance *= cov_norm
+    return LocalMoments(image, mean, variance, win_size, window_sigma)
+
+
+def ssim_from_moments(first: LocalMoments, second: LocalMoments, data_range: float = 255) -> float:
+    """
+    Compute the mean structural similarity of two frames from their precomputed local moments.
+
+    Only the cross term needs a new filter pass, and no SSIM map is kept beyond the reduction.
+    Like scikit-image, the border where the window does not fit is excluded from the mean.
+
+    Args:
+    first (LocalMoments): Moments of the first frame.
+    second (LocalMoments): Moments of the second frame, computed with the same window.
+    data_range (float): Range of the pixel values. Defaults to 255.
+
+    Returns:
+    float: Mean SSIM of the two frames.
+    """
+    if first.image.shape != second.image.shape:
+        raise ValueError("Images must have the same dimensions")
+    if (first.win_size, first.sigma) != (second.win_size, second.sigma):
+        raise ValueError("Moments must be computed with the same window")
+
+    win_size = first.win_size
+    cov_norm = 1.0 if first.sigma is not None else win_size * win_size / (win_size * win_size - 1)
+    c1 = (0.01 * data_range) ** 2
+    c2 = (0.03 * data_range) ** 2
+
+    covariance = _local_filter(multiply(first.image, second.image), win_size, first.sigma)
+    mean_product = multiply(first.mean, second.mean)
+    covariance -= mean_product
+    covariance *= cov_norm
+
+    # Numerator (2 ux uy + C1)(2 vxy + C2)
+    numerator = mean_product * 2 + c1
+    covariance *= 2
+    covariance += c2
+    numerator *= covariance
+
+    # Denominator (ux^2 + uy^2 + C1)(vx + vy + C2)
+    denominator = multiply(first.mean, first.mean) + multiply(second.mean, second.mean) + c1
+    denominator *= first.variance + second.variance + c2
+
+    numerator /= denominator
+    pad = (win_size - 1) // 2
+    return float(numerator[pad:-pad or None, pad:-pad or None].mean(dtype=float64))
+
+
+def structural_similarity_mean(img1: ndarray, img2: ndarray, win_size: int = 7, gaussian: bool = False,
+                               data_range: float = 255) -> float:
+    """
+    Compute the mean SSIM of two grayscale frames without building moments ahead of time.
+
+    Args:
+    img1 (np.ndarray): First grayscale frame.
+    img2 (np.ndarray): Second grayscale frame.
+    win_size (int): Side of the uniform window. Defaults to 7.
+    gaussian (bool): Use an 11x11 Gaussian window instead. Defaults to False.
+    data_range (float): Range of the pixel values. Defaults to 255.
+
+    Returns:
+    float: Mean SSIM of the two frames.
+    """
+    return ssim_from_moments(local_moments(img1, win_size, gaussian), local_moments(img2, win_size, gaussian),
+                             data_range)
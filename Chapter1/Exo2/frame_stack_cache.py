@@ -0,0 +1,111 @@
+import json
+import os
+from hashlib import sha1
+from typing import List, Dict, Optional, Union, Tuple
+
+from numpy import ndarray, load
+from numpy.lib.format import open_memmap
+
+
+def _cache_paths(cache_dir: str, directory: str) -> Tuple[str, str]:
+    """
+    Paths of the stack and manifest caching the sequence of a directory.
+    """
+    key = sha1(os.path.abspath(directory).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"frames_{key}.npy"), os.path.join(cache_dir, f"frames_{key}.json")
+
+
+def build_manifest(image_files: List[str]) -> List[Dict[str, Union[str, int]]]:
+    """
+    Describe the image files of a sequence by name, size and modification time.
+
+    Args:
+    image_files (List[str]): Paths of the image files in sequence order.
+
+    Returns:
+    List[Dict[str, Union[str, int]]]: One entry per file.
+    """
+    manifest = []
+    for path in image_files:
+        stat = os.stat(path)
+        manifest.append({"name": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+    return manifest
+
+
+def load_frame_stack(cache_dir: str, directory: str, image_files: List[str]) -> Optional[ndarray]:
+    """
+    Memory-map the cached frame stack of a sequence if it is still up to date.
+
+    The cache is valid when its manifest starts with the current name, size and modification time
+    of every requested file, so a longer cached sequence also serves shorter requests.
+
+    Args:
+    cache_dir (str): Directory holding the cache files.
+    directory (str): Directory of the image sequence.
+    image_files (List[str]): Paths of the requested image files in sequence order.
+
+    Returns:
+    Optional[np.ndarray]: Read-only memory-mapped (T, H, W, C) stack of the requested frames,
+                          or None if the cache is missing or stale.
+    """
+    stack_path, manifest_path = _cache_paths(cache_dir, directory)
+    try:
+        with open(manifest_path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        manifest = build_manifest(image_files)
+    except OSError:
+        return None
+
+    if cached["files"][:len(manifest)] != manifest:
+        return None
+
+    try:
+        stack = load(stack_path, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+
+    if len(stack) != len(cached["files"]):
+        return None
+    return stack[:len(manifest)]
+
+
+def save_frame_stack(cache_dir: str, directory: str, image_files: List[str], frames: List[ndarray]) -> bool:
+    """
+    Store decoded frames as one contiguous .npy stack with a manifest of their source files.
+
+    Both files are written under temporary names and renamed, so readers never see a partial cache.
+
+    Args:
+    cache_dir (str): Directory holding the cache files.
+    directory (str): Directory of the image sequence.
+    image_files (List[str]): Paths of the image files in sequence order.
+    frames (List[np.ndarray]): Decoded frames, matching image_files.
+
+    Returns:
+    bool: True if the cache was written, False if the frames differ in shape or type and cannot be stacked.
+    """
+    if not frames:
+        return False
+
+    first = frames[0]
+    if any(frame.shape != first.shape or frame.dtype != first.dtype for frame in frames):
+        return False
+
+    os.makedirs(cache_dir, exist_ok=True)
+    stack_path, manifest_path = _cache_paths(cache_dir, directory)
+
+    stack = open_memmap(stack_path + ".tmp", mode='w+', dtype=first.dtype, shape=(len(frames),) + first.shape)
+    for i, frame in enumerate(frames):
+        stack[i] = frame
+    stack.flush()
+    del stack
+    os.replace(stack_path + ".tmp", stack_path)
+
+    with open(manifest_path + ".tmp", 'w') as f:
+        json.dump({"directory": os.path.abspath(directory), "files": build_manifest(image_files)}, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return True
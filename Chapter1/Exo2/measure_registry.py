@@ -0,0 +1,123 @@
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from cv2 import absdiff, calcOpticalFlowFarneback, cartToPolar, countNonZero, threshold, THRESH_BINARY
+from numpy import ndarray, mean
+from skimage.metrics import structural_similarity as ssim
+
+from Chapter1.Exo2.fast_ssim import local_moments, ssim_from_moments
+
+
+class Intermediate(NamedTuple):
+    """
+    A per-pair value shared by measures, computed from other intermediates.
+    """
+    requires: Tuple[str, ...]
+    compute: Callable[..., Any]
+
+
+class Measure(NamedTuple):
+    """
+    A scalar measure of a frame pair, computed from the intermediates it declares.
+    """
+    requires: Tuple[str, ...]
+    compute: Callable[..., float]
+
+
+def _farneback_flow(prev_gray: ndarray, gray: ndarray) -> ndarray:
+    return calcOpticalFlowFarneback(prev_gray, gray, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+
+
+def _flow_magnitude(flow: ndarray) -> float:
+    magnitude, _ = cartToPolar(flow[..., 0], flow[..., 1])
+    return mean(magnitude)
+
+
+def changed_fraction_measure(min_difference: int = 15) -> Measure:
+    """
+    Create a measure of the fraction of pixels whose absolute frame difference is at least min_difference.
+
+    Unlike the motion of process_image_sequence, the mean absolute difference, this counts how much of
+    the frame changed rather than by how much, so a small object moving fast and a slight change over the
+    whole frame are told apart. The default of 15 grey levels stays above the sensor noise and compression
+    artifacts of 8-bit video, a few levels, while still catching moving edges. Register another threshold
+    with e.g. register_measure("Frame Difference Motion", *changed_fraction_measure(25)).
+
+    Args:
+    min_difference (int): Smallest absolute difference, between 1 and 255, of a changed pixel. Defaults to 15.
+
+    Returns:
+    Measure: The measure, computed from the frame difference.
+    """
+    if not 1 <= min_difference <= 255:
+        raise ValueError("min_difference must be between 1 and 255")
+
+    def changed_fraction(frame_diff: ndarray) -> float:
+        changed = threshold(frame_diff, min_difference - 1, 1, THRESH_BINARY)[1]
+        return countNonZero(changed) / frame_diff.size
+
+    return Measure(("frame_diff",), changed_fraction)
+
+
+# "gray" and "prev_gray" are given, "prev_<name>" reuses "<name>" of the previous pair when it was computed
+INTERMEDIATES: Dict[str, Intermediate] = {
+    "frame_diff": Intermediate(("prev_gray", "gray"), absdiff),
+    "flow": Intermediate(("prev_gray", "gray"), _farneback_flow),
+    "moments": Intermediate(("gray",), local_moments),
+    "prev_moments": Intermediate(("prev_gray",), local_moments),
+}
+
+MEASURES: Dict[str, Measure] = {
+    "Temporal Gradient Magnitude": Measure(("frame_diff",), mean),
+    "Structural Similarity Index": Measure(("prev_moments", "moments"), ssim_from_moments),
+    "Optical Flow Magnitude": Measure(("flow",), _flow_magnitude),
+    "Frame Difference Motion": changed_fraction_measure(),
+}
+
+# Reference SSIM used when the fast implementation is turned off
+SKIMAGE_SSIM = Measure(("prev_gray", "gray"), lambda prev_gray, gray: ssim(prev_gray, gray, full=True)[0])
+
+DEFAULT_MEASURES = ("Temporal Gradient Magnitude", "Structural Similarity Index", "Optical Flow Magnitude")
+
+
+def register_measure(name: str, requires: Tuple[str, ...], compute: Callable[..., float]) -> None:
+    """
+    Register a measure plugin.
+
+    Args:
+    name (str): Name of the measure, used as key of the returned measures.
+    requires (Tuple[str, ...]): Names of the intermediates passed to compute, in order.
+    compute (Callable[..., float]): Function of the required intermediates returning the measure.
+    """
+    for requirement in requires:
+        if requirement not in INTERMEDIATES and requirement not in ("gray", "prev_gray"):
+            raise ValueError(f"Unknown intermediate: {requirement}")
+    MEASURES[name] = Measure(requires, compute)
+
+
+class PairIntermediates:
+    """
+    Lazily computed intermediates of one frame pair, each computed at most once.
+    """
+
+    def __init__(self, prev_gray: ndarray, gray: ndarray, previous: Optional["PairIntermediates"] = None):
+        """
+        Args:
+        prev_gray (np.ndarray): Previous grayscale frame.
+        gray (np.ndarray): Current grayscale frame.
+        previous (Optional[PairIntermediates]): Intermediates of the previous pair, whose per-frame
+                                                values are reused for "prev_" intermediates.
+        """
+        self.values: Dict[str, Any] = {"prev_gray": prev_gray, "gray": gray}
+        if previous is not None:
+            for name, value in previous.values.items():
+                if name != "gray" and "prev_" + name in INTERMEDIATES:
+                    self.values["prev_" + name] = value
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self.values:
+            intermediate = INTERMEDIATES[name]
+            self.values[name] = intermediate.compute(*(self[requirement] for requirement in intermediate.requires))
+        return self.values[name]
+
+    def measure(self, measure: Measure) -> float:
+        return measure.compute(*(self[requirement] for requirement in measure.requires))
@@ -1,6 +1,8 @@
-from typing import Dict, List
+from collections import deque
+from math import sqrt
+from typing import Dict, List, Optional, Deque
 
-from numpy import std, array, mean
+from numpy import std, asarray, mean
 
 from Chapter1.Exo2.calculate_data_measures import calculate_data_measures
 from Chapter1.Exo2.read_image_sequence import read_image_sequence, process_image_sequence
@@ -22,7 +24,7 @@ def normalize_measures(measures: Dict[str, List[float]]) -> Dict[str, List[float
     normalized_measures = {}
 
     for name, values in measures.items():
-        values = array(values)
+        values = asarray(values)
         expectation = mean(values)
         deviation = std(values)
 
@@ -41,6 +43,146 @@ def normalize_measures(measures: Dict[str, List[float]]) -> Dict[str, List[float
     return normalized_measures
 
 
+class StreamingNormalizer:
+    """
+    Online normalization of one measure with Welford's running mean and variance.
+
+    Modes:
+    - "cumulative": statistics of every value seen so far; shards can be combined with merge.
+    - "exponential": exponentially decaying statistics, recent values weigh more (needs decay).
+    - "window": statistics of the last window values only (needs window).
+
+    Variances are population variances, as in normalize_measures, so that normalizing every value with the
+    final cumulative statistics gives the same result as the batch function up to rounding error.
+    """
+
+    def __init__(self, mode: str = "cumulative", decay: Optional[float] = None, window: Optional[int] = None,
+                 target_mean: float = 0, target_std: float = 1):
+        """
+        Args:
+        mode (str): One of "cumulative", "exponential" or "window". Defaults to "cumulative".
+        decay (Optional[float]): Weight of the newest value in (0, 1] for the exponential mode.
+        window (Optional[int]): Number of most recent values kept for the window mode.
+        target_mean (float): Expectation of the normalized values. Defaults to 0.
+        target_std (float): Standard deviation of the normalized values. Defaults to 1.
+        """
+        if mode not in ("cumulative", "exponential", "window"):
+            raise ValueError(f"Unknown normalization mode: {mode}")
+        if mode == "exponential" and (decay is None or not 0 < decay <= 1):
+            raise ValueError("The exponential mode needs a decay in (0, 1]")
+        if mode == "window" and (window is None or window < 1):
+            raise ValueError("The window mode needs a positive window size")
+
+        self.mode = mode
+        self.decay = decay
+        self.window = window
+        self.target_mean = target_mean
+        self.target_std = target_std
+
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations (cumulative, window) or variance (exponential)
+        self._values: Deque[float] = deque()
+
+    @property
+    def variance(self) -> float:
+        if self.count == 0:
+            return 0.0
+        if self.mode == "exponential":
+            return self._m2
+        return max(self._m2 / self.count, 0.0)
+
+    @property
+    def std(self) -> float:
+        return sqrt(self.variance)
+
+    def update(self, value: float) -> None:
+        """
+        Add a value to the running statistics.
+
+        Args:
+        value (float): New measure value.
+        """
+        value = float(value)
+
+        if self.mode == "exponential":
+            if self.count == 0:
+                self.mean, self._m2 = value, 0.0
+            else:
+                delta = value - self.mean
+                self.mean += self.decay * delta
+                self._m2 = (1 - self.decay) * (self._m2 + self.decay * delta * delta)
+            self.count += 1
+            return
+
+        if self.mode == "window" and self.count == self.window:
+            # Remove the oldest value by reversing its Welford update
+            old = self._values.popleft()
+            self.count -= 1
+            if self.count == 0:
+                self.mean, self._m2 = 0.0, 0.0
+            else:
+                old_mean = self.mean
+                self.mean -= (old - self.mean) / self.count
+                self._m2 -= (old - self.mean) * (old - old_mean)
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.mode == "window":
+            self._values.append(value)
+
+    def normalize(self, value: float) -> float:
+        """
+        Normalize a value with the current statistics.
+
+        Args:
+        value (float): Measure value.
+
+        Returns:
+        float: Normalized value.
+        """
+        deviation = self.std
+
+        # Avoid division by zero
+        if deviation == 0:
+            deviation = 1e-6
+
+        return (float(value) - self.mean) / deviation * self.target_std + self.target_mean
+
+    def update_and_normalize(self, value: float) -> float:
+        """
+        Add a value to the running statistics, then normalize it.
+
+        Args:
+        value (float): New measure value.
+
+        Returns:
+        float: Normalized value.
+        """
+        self.update(value)
+        return self.normalize(value)
+
+    def merge(self, other: "StreamingNormalizer") -> None:
+        """
+        Combine the statistics of another shard into this one (Chan et al. parallel update).
+
+        Args:
+        other (StreamingNormalizer): Cumulative normalizer of another part of the data.
+        """
+        if self.mode != "cumulative" or other.mode != "cumulative":
+            raise ValueError("Only cumulative statistics can be merged")
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+
 def main():
     try:
         # Replace with your actual directory path
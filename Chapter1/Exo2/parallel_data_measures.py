@@ -0,0 +1,127 @@
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from os import cpu_count
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Dict, Optional, Tuple, Sequence
+
+from cv2 import cvtColor, COLOR_BGR2GRAY, setNumThreads
+from numpy import ndarray, uint8, std, mean
+
+from Chapter1.Exo2.calculate_data_measures import calculate_gray_measures
+from Chapter1.Exo2.read_image_sequence import read_image_sequence
+
+
+def _init_worker() -> None:
+    # Each process handles its own chunk, avoid oversubscribing the cores with OpenCV threads
+    setNumThreads(1)
+
+
+def _measure_chunk(shm_name: str, shape: Tuple[int, ...], start: int, stop: int, fast_ssim: bool,
+                   measures: Optional[Sequence[str]]) -> Dict[str, List[float]]:
+    """
+    Measure the frame pairs of frames start to stop (inclusive) of a grayscale stack in shared memory.
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        grays = ndarray(shape, dtype=uint8, buffer=shm.buf)
+        values = calculate_gray_measures(grays[start:stop + 1], fast_ssim, measures)
+        del grays
+        return values
+    finally:
+        shm.close()
+
+
+def calculate_data_measures_parallel(
+        images: List[ndarray],
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        fast_ssim: bool = True,
+        measures: Optional[Sequence[str]] = None
+) -> Dict[str, List[float]]:
+    """
+    Calculate the data measures of calculate_data_measures with a process pool.
+
+    The grayscale frames are stacked once in shared memory, so workers read them without pickling.
+    The sequence is split into chunks of frame pairs that overlap by one frame, each chunk is measured
+    by a worker and the per-pair lists are stitched back in order. The output is identical to the
+    serial calculate_data_measures.
+
+    Args:
+    images (List[np.ndarray]): List of images as numpy arrays, all of the same size.
+    max_workers (Optional[int]): Number of worker processes, or None for the CPU count. Defaults to None.
+    chunk_size (Optional[int]): Number of frame pairs per chunk, or None to give each worker one chunk.
+                                Defaults to None.
+    fast_ssim (bool): Compute SSIM with the in-project float32 implementation. Defaults to True.
+    measures (Optional[Sequence[str]]): Names of the registered measures to compute, or None for the
+                                        default measures. Defaults to None.
+
+    Returns:
+    Dict[str, List[float]]: Dictionary containing lists of measure values for each frame.
+
+    Raises:
+    ValueError: If fewer than two images are given or they differ in size.
+    """
+    if len(images) < 2:
+        raise ValueError("At least two images are required")
+    # cvtColor would allocate a new array instead of filling a shared slot of another size
+    for i, img in enumerate(images):
+        if img.shape[:2] != images[0].shape[:2]:
+            raise ValueError(f"Frame {i} is {img.shape[:2]}, expected {images[0].shape[:2]} like frame 0")
+
+    num_pairs = len(images) - 1
+    if max_workers is None:
+        max_workers = cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = ceil(num_pairs / max_workers)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        first = cvtColor(images[0], COLOR_BGR2GRAY)
+        shape = (len(images),) + first.shape
+        shm = SharedMemory(create=True, size=first.nbytes * len(images))
+        try:
+            grays = ndarray(shape, dtype=uint8, buffer=shm.buf)
+            grays[0] = first
+            for i in range(1, len(images)):
+                cvtColor(images[i], COLOR_BGR2GRAY, dst=grays[i])
+
+            # Chunk k measures pairs [start, stop), i.e. frames start to stop inclusive
+            futures = [
+                executor.submit(_measure_chunk, shm.name, shape, start, min(start + chunk_size, num_pairs), fast_ssim,
+                                measures)
+                for start in range(0, num_pairs, chunk_size)
+            ]
+
+            values: Dict[str, List[float]] = {}
+            for future in futures:
+                for name, chunk_values in future.result().items():
+                    values.setdefault(name, []).extend(chunk_values)
+
+            del grays
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return values
+
+
+def main():
+    try:
+        # Replace with your actual directory path
+        image_sequence = read_image_sequence("../../gif", num_frames=50)
+        print(f"Successfully read {len(image_sequence)} images.")
+
+        # Calculate and print data measures
+        data_measures = calculate_data_measures_parallel(image_sequence)
+        for measure, values in data_measures.items():
+            print(f"\n{measure} statistics:")
+            print(f"  Min: {min(values):.4f}")
+            print(f"  Max: {max(values):.4f}")
+            print(f"  Mean: {mean(values):.4f}")
+            print(f"  Std Dev: {std(values):.4f}")
+
+    except ValueError as e:
+        print(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,44 @@
-from typing import List, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from math import sqrt
+from typing import List, Tuple, Optional, Iterable, Iterator
 
-from cv2 import imread, cvtColor, COLOR_BGR2GRAY, absdiff
-from numpy import std, mean, ndarray
+from cv2 import imread, cvtColor, COLOR_BGR2GRAY, absdiff, VideoCapture, CAP_PROP_POS_FRAMES
+from numpy import std, mean, ndarray, empty, uint8, uint16, int64, uint64
 
+from Chapter1.Exo2.frame_stack_cache import load_frame_stack, save_frame_stack
 
-def read_image_sequence(directory: str, num_frames: int = 50) -> List[ndarray]:
+
+def read_frame(path: str) -> ndarray:
     """
-    Reads an image sequence from a directory.
+    Reads a single frame of an image sequence.
+
+    Args:
+    path (str): Path to the image file.
+
+    Returns:
+    np.ndarray: The decoded image.
+
+    Raises:
+    ValueError: If the image cannot be read.
+    """
+    img = imread(path)
+    if img is None:
+        raise ValueError(f"Failed to read image: {path}")
+    return img
+
+
+def list_image_files(directory: str, num_frames: int) -> List[str]:
+    """
+    Lists the first image files of a sequence in sorted order.
 
     Args:
     directory (str): Path to the directory containing the image sequence.
-    num_frames (int): Minimum number of frames to read. Defaults to 50.
+    num_frames (int): Minimum number of frames to list.
 
     Returns:
-    List[np.ndarray]: List of images as numpy arrays.
+    List[str]: Paths of the first num_frames images.
 
     Raises:
     ValueError: If fewer than num_frames images are found in the directory.
@@ -28,22 +53,177 @@ def read_image_sequence(directory: str, num_frames: int = 50) -> List[ndarray]:
         raise ValueError(
             f"Not enough images in the directory. Found {len(image_files)}, but {num_frames} are required.")
 
-    images = []
-    for i in range(num_frames):
-        img = imread(image_files[i])
-        if img is None:
-            raise ValueError(f"Failed to read image: {image_files[i]}")
-        images.append(img)
+    return image_files[:num_frames]
+
+
+def read_image_sequence(directory: str, num_frames: int = 50, max_workers: Optional[int] = 1,
+                        cache_dir: Optional[str] = None) -> List[ndarray]:
+    """
+    Reads an image sequence from a directory.
+
+    With more than one worker, frames are decoded in a thread pool (OpenCV releases the GIL while
+    decoding) and returned in the original sorted order.
+
+    With a cache directory, decoded frames are stored there as one memory-mapped stack. Later calls
+    whose files still match the cached names, sizes and modification times return read-only views
+    into the stack instead of decoding, and frames are only paged in when accessed.
+
+    Args:
+    directory (str): Path to the directory containing the image sequence.
+    num_frames (int): Minimum number of frames to read. Defaults to 50.
+    max_workers (Optional[int]): Number of decoding threads, 1 to decode serially or None for the
+                                 executor default. Defaults to 1.
+    cache_dir (Optional[str]): Directory of the decoded frame stack cache, or None to always decode.
+                               Defaults to None.
+
+    Returns:
+    List[np.ndarray]: List of images as numpy arrays.
+
+    Raises:
+    ValueError: If fewer than num_frames images are found in the directory or an image cannot be read.
+    """
+    image_files = list_image_files(directory, num_frames)
+
+    if cache_dir is not None:
+        stack = load_frame_stack(cache_dir, directory, image_files)
+        if stack is not None:
+            return list(stack)
+
+    if max_workers == 1:
+        images = [read_frame(path) for path in image_files]
+    else:
+        # map keeps the input order and re-raises the first failure in that order
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            images = list(executor.map(read_frame, image_files))
+
+    if cache_dir is not None:
+        save_frame_stack(cache_dir, directory, image_files, images)
 
     return images
 
 
-def process_image_sequence(images: List[ndarray]) -> Tuple[float, float, float]:
+def stream_image_sequence(directory: str, num_frames: int = 50, prefetch: int = 4,
+                          max_workers: Optional[int] = 1) -> Iterator[ndarray]:
+    """
+    Yields the frames of an image sequence one at a time, decoding at most prefetch frames ahead.
+
+    Only the frames in flight are held in memory, so memory stays constant whatever the sequence length.
+
+    Args:
+    directory (str): Path to the directory containing the image sequence.
+    num_frames (int): Minimum number of frames to read. Defaults to 50.
+    prefetch (int): Maximum number of frames decoded ahead of the consumer, 0 to decode on demand. Defaults to 4.
+    max_workers (Optional[int]): Number of decoding threads, or None for the executor default. Defaults to 1.
+
+    Yields:
+    np.ndarray: The images in sorted order.
+
+    Raises:
+    ValueError: If fewer than num_frames images are found in the directory or an image cannot be read.
+    """
+    image_files = list_image_files(directory, num_frames)
+
+    if prefetch <= 0:
+        for path in image_files:
+            yield read_frame(path)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        paths = iter(image_files)
+        pending = deque(executor.submit(read_frame, path) for path in islice(paths, prefetch))
+        try:
+            while pending:
+                img = pending.popleft().result()
+                path = next(paths, None)
+                if path is not None:
+                    pending.append(executor.submit(read_frame, path))
+                yield img
+        finally:
+            # Drop the read-ahead if the consumer stops early
+            for future in pending:
+                future.cancel()
+
+
+def stream_video(path: str, start: int = 0, end: Optional[int] = None, stride: int = 1,
+                 seek: bool = False) -> Iterator[ndarray]:
+    """
+    Yields frames of a video file, e.g. as input of process_image_sequence or calculate_data_measures.
+
+    Frames before start and between sampled frames are skipped with grab(), which demuxes them
+    without decoding, or, with seek enabled, by setting the frame position directly, which is
+    faster for large strides but only as exact as the container's seeking.
+
+    Args:
+    path (str): Path to the video file.
+    start (int): Index of the first frame. Defaults to 0.
+    end (Optional[int]): Index past the last frame, or None for the end of the video. Defaults to None.
+    stride (int): Step between yielded frames. Defaults to 1.
+    seek (bool): Skip frames by seeking instead of grabbing. Defaults to False.
+
+    Yields:
+    np.ndarray: The sampled frames in BGR format.
+
+    Raises:
+    ValueError: If the video cannot be opened or the arguments are invalid.
+    """
+    if start < 0 or stride < 1 or (end is not None and end < start):
+        raise ValueError("start must be non-negative, stride positive and end not before start")
+
+    capture = VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Failed to open video: {path}")
+
+    try:
+        position = 0
+        index = start
+        while end is None or index < end:
+            if seek and index != position:
+                capture.set(CAP_PROP_POS_FRAMES, index)
+                position = index
+
+            # Skip to the next sampled frame without decoding
+            while position < index:
+                if not capture.grab():
+                    return
+                position += 1
+
+            ok, frame = capture.read()
+            if not ok:
+                return
+            position += 1
+
+            yield frame
+            index += stride
+    finally:
+        capture.release()
+
+
+def read_video(path: str, start: int = 0, end: Optional[int] = None, stride: int = 1,
+               seek: bool = False) -> List[ndarray]:
+    """
+    Reads the sampled frames of a video file, see stream_video.
+
+    Args:
+    path (str): Path to the video file.
+    start (int): Index of the first frame. Defaults to 0.
+    end (Optional[int]): Index past the last frame, or None for the end of the video. Defaults to None.
+    stride (int): Step between frames. Defaults to 1.
+    seek (bool): Skip frames by seeking instead of grabbing. Defaults to False.
+
+    Returns:
+    List[np.ndarray]: List of images as numpy arrays.
+    """
+    return list(stream_video(path, start, end, stride, seek))
+
+
+def process_image_sequence(images: Iterable[ndarray]) -> Tuple[float, float, float]:
     """
     Process the image sequence and return some basic statistics.
 
+    The images are consumed in a single pass, so a stream of frames can be processed in constant memory.
+
     Args:
-    images (List[np.ndarray]): List of images as numpy arrays.
+    images (Iterable[np.ndarray]): Images as numpy arrays, e.g. a list or a stream_image_sequence generator.
 
     Returns:
     Tuple[float, float, float]: Average brightness, average contrast, average motion (using simple frame difference).
@@ -52,7 +232,8 @@ def process_image_sequence(images: List[ndarray]) -> Tuple[float, float, float]:
     contrast = []
     motion = []
 
-    for i, img in enumerate(images):
+    prev_gray = None
+    for img in images:
         # Convert to grayscale
         gray = cvtColor(img, COLOR_BGR2GRAY)
 
@@ -63,11 +244,82 @@ def process_image_sequence(images: List[ndarray]) -> Tuple[float, float, float]:
         contrast.append(std(gray))
 
         # Calculate motion (if not the first frame)
-        if i > 0:
-            prev_gray = cvtColor(images[i - 1], COLOR_BGR2GRAY)
+        if prev_gray is not None:
             frame_diff = absdiff(gray, prev_gray)
             motion.append(mean(frame_diff))
 
+        prev_gray = gray
+
+    return float(mean(brightness)), float(mean(contrast)), float(mean(motion))
+
+
+def process_image_sequence_stacked(images: Iterable[ndarray], chunk_size: int = 16) -> Tuple[float, float, float]:
+    """
+    Vectorized equivalent of process_image_sequence working on stacked grayscale chunks.
+
+    Each frame is converted to grayscale once, into a (chunk_size + 1, H, W) buffer whose first slot
+    carries the last frame of the previous chunk. Brightness, contrast and motion of a whole chunk are then
+    computed with axis-wise reductions, so memory is bounded by the chunk size rather than the sequence length.
+    Contrast is computed from exact integer moments and agrees with process_image_sequence to rounding error.
+
+    Args:
+    images (Iterable[np.ndarray]): Images as numpy arrays, all of the same size.
+    chunk_size (int): Number of frames reduced at once. Defaults to 16.
+
+    Returns:
+    Tuple[float, float, float]: Average brightness, average contrast, average motion (using simple frame difference).
+
+    Raises:
+    ValueError: If the images differ in size.
+    """
+    brightness = []
+    contrast = []
+    motion = []
+
+    buffer = None
+    carried = 0  # 1 once the buffer starts with the last frame of the previous chunk
+    filled = 0
+
+    def reduce_chunk() -> None:
+        grays = buffer[carried:carried + filled]
+        num_pixels = grays.shape[1] * grays.shape[2]
+        flat = grays.reshape(filled, num_pixels)
+
+        # Calculate brightness (average pixel intensity)
+        brightness.extend(flat.mean(axis=1))
+
+        # Calculate contrast from integer moments, squares of 8-bit values fit in 16 bits
+        squares = flat.astype(uint16)
+        squares *= squares
+        sums = flat.sum(axis=1, dtype=int64)
+        square_sums = squares.sum(axis=1, dtype=uint64)
+        for s1, s2 in zip(sums.tolist(), square_sums.tolist()):
+            contrast.append(sqrt((num_pixels * s2 - s1 * s1) / (num_pixels * num_pixels)))
+
+        # Calculate motion between consecutive frames, including the carried one
+        stacked = buffer[:carried + filled].reshape(carried + filled, num_pixels)
+        if len(stacked) > 1:
+            motion.extend(absdiff(stacked[1:], stacked[:-1]).mean(axis=1))
+
+    for img in images:
+        if buffer is None:
+            buffer = empty((chunk_size + 1,) + img.shape[:2], dtype=uint8)
+        elif img.shape[:2] != buffer.shape[1:]:
+            # cvtColor would allocate a new array instead of filling the slot
+            raise ValueError(f"Frame of size {img.shape[:2]} does not match the sequence size {buffer.shape[1:]}")
+
+        # Convert to grayscale straight into the stack
+        cvtColor(img, COLOR_BGR2GRAY, dst=buffer[carried + filled])
+        filled += 1
+
+        if filled == chunk_size:
+            reduce_chunk()
+            buffer[0] = buffer[carried + filled - 1]
+            carried, filled = 1, 0
+
+    if filled:
+        reduce_chunk()
+
     return float(mean(brightness)), float(mean(contrast)), float(mean(motion))
 
 
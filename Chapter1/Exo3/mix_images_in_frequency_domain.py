@@ -1,21 +1,31 @@
+from typing import Tuple
+
 from cv2 import imshow, waitKey, DFT_COMPLEX_OUTPUT, destroyAllWindows, polarToCart, NORM_MINMAX, IMREAD_GRAYSCALE, dft, \
-    cartToPolar, merge, normalize, idft, imread, magnitude
-from numpy import float32, uint8, ndarray
+    cartToPolar, merge, normalize, idft, imread, magnitude, getOptimalDFTSize
+from numpy import float32, uint8, ndarray, abs as np_abs, where
+from scipy.fft import rfft2, irfft2
 
 
-def mix_images_in_frequency_domain(img1: ndarray, img2: ndarray) -> ndarray:
+def mix_images_in_frequency_domain(img1: ndarray, img2: ndarray, real_fft: bool = True,
+                                   optimal_size: bool = False) -> ndarray:
     """
     Transform two images into the frequency domain, mix their amplitudes and phases,
     and transform the result back to the spatial domain.
 
     :param img1: First input image (numpy array)
     :param img2: Second input image (numpy array)
+    :param real_fft: Use the half-spectrum real transforms of mix_images_real_fft
+                     instead of full complex DFTs
+    :param optimal_size: Zero-pad the real transforms to getOptimalDFTSize, see mix_images_real_fft
     :return: Mixed image in spatial domain
     """
     # Check if images have the same size
     if img1.shape != img2.shape:
         raise ValueError("Images must have the same dimensions")
 
+    if real_fft:
+        return mix_images_real_fft(img1, img2, optimal_size)
+
     # Convert images to float32
     img1_float = float32(img1)
     img2_float = float32(img2)
@@ -41,6 +51,103 @@ def mix_images_in_frequency_domain(img1: ndarray, img2: ndarray) -> ndarray:
     return uint8(mixed_image)
 
 
+def mix_images_real_fft(img1: ndarray, img2: ndarray, optimal_size: bool = False) -> ndarray:
+    """
+    Mix the amplitude of img1 with the phase of img2 using real-input FFTs on half spectra.
+
+    The spectrum of a real image is Hermitian, and so is the mix of two of them, so only half of it
+    is transformed and the inverse is real. The polar round trip is fused into a single complex
+    scaling, amplitude1 * exp(i phase2) = spectrum2 * amplitude1 / amplitude2, done in place.
+    The result matches the complex path up to float32 rounding.
+
+    Zero-padding to getOptimalDFTSize speeds up awkward sizes further, but mixes the spectra of the
+    padded images, so the cropped result differs from the unpadded mix.
+
+    :param img1: First input image (numpy array), providing the amplitude
+    :param img2: Second input image (numpy array), providing the phase
+    :param optimal_size: Zero-pad both images to the optimal DFT size and crop the result back
+    :return: Mixed image in spatial domain
+    """
+    if img1.shape != img2.shape:
+        raise ValueError("Images must have the same dimensions")
+
+    height, width = img1.shape[:2]
+    shape = dft_shape(img1, optimal_size)
+
+    # Amplitude of img1, dropping its spectrum right away
+    amplitude = np_abs(rfft2(float32(img1), s=shape, axes=(0, 1)))
+    _, phase = polar_spectrum(img2, shape)
+    return mix_polar_spectra(amplitude, phase, shape, (height, width))
+
+
+def dft_shape(img: ndarray, optimal_size: bool = False) -> Tuple[int, int]:
+    """
+    Size of the transforms of an image, optionally rounded up to getOptimalDFTSize.
+
+    :param img: Input image (numpy array)
+    :param optimal_size: Round each side up to the optimal DFT size
+    :return: Height and width of the transforms
+    """
+    height, width = img.shape[:2]
+    if optimal_size:
+        return getOptimalDFTSize(height), getOptimalDFTSize(width)
+    return height, width
+
+
+def polar_spectrum(img: ndarray, shape: Tuple[int, int]) -> Tuple[ndarray, ndarray]:
+    """
+    Compute the amplitude and phase of the half spectrum of a real image.
+
+    The phase is kept as a unit complex factor exp(i phase), so that mixing needs no trigonometry.
+
+    :param img: Input image (numpy array)
+    :param shape: Size of the transforms, at least the image size, see dft_shape
+    :return: float32 amplitude and complex64 phase factor of the half spectrum
+    """
+    spectrum = rfft2(float32(img), s=shape, axes=(0, 1))
+    amplitude = np_abs(spectrum)
+    # cartToPolar gives a zero phase to zero coefficients
+    zero = amplitude == 0
+    spectrum[zero] = 1
+    spectrum /= where(zero, float32(1), amplitude)
+    return amplitude, spectrum
+
+
+def mix_polar_spectra(amplitude: ndarray, phase: ndarray, shape: Tuple[int, int], size: Tuple[int, int]) -> ndarray:
+    """
+    Combine an amplitude and a phase factor from polar_spectrum and transform them back.
+
+    :param amplitude: Amplitude of the half spectrum
+    :param phase: Phase factor of the half spectrum
+    :param shape: Size of the transforms
+    :param size: Height and width of the image, to crop the padding
+    :return: Mixed image in spatial domain
+    """
+    mixed_image = inverse_polar_spectra(amplitude, phase, shape, size)
+
+    # Normalize the result for display
+    normalize(mixed_image, mixed_image, 0, 255, NORM_MINMAX)
+    return uint8(mixed_image)
+
+
+def inverse_polar_spectra(amplitude: ndarray, phase: ndarray, shape: Tuple[int, int],
+                          size: Tuple[int, int]) -> ndarray:
+    """
+    Transform an amplitude and a phase factor back to the absolute spatial values, before normalization.
+
+    :param amplitude: Amplitude of the half spectrum
+    :param phase: Phase factor of the half spectrum
+    :param shape: Size of the transforms
+    :param size: Height and width of the image, to crop the padding
+    :return: float32 mixed values in spatial domain
+    """
+    combined = phase * amplitude
+
+    # Transform back to spatial domain and crop the padding
+    mixed_image = irfft2(combined, s=shape, axes=(0, 1))[:size[0], :size[1]]
+    return np_abs(mixed_image, out=mixed_image)
+
+
 def load_and_prepare_image(path: str) -> ndarray:
     """
     Load an image and convert it to grayscale.
@@ -1,9 +1,11 @@
-from typing import Callable
+from numbers import Real
+from typing import Callable, NamedTuple, Sequence, Union
 
 from cv2 import imshow, waitKey, DFT_COMPLEX_OUTPUT, destroyAllWindows, polarToCart, NORM_MINMAX, IMREAD_GRAYSCALE, dft, \
-    cartToPolar, merge, normalize, idft, imread, magnitude
-from numpy import float32, uint8, ndarray
+    cartToPolar, merge, normalize, idft, imread, magnitude, namedWindow, createTrackbar
+from numpy import float32, uint8, ndarray, empty, stack, sin, cos, abs as np_abs
 from numpy.fft import fftshift, ifftshift
+from scipy.fft import ifft2
 
 
 def modify_texture_in_frequency_domain(
@@ -51,6 +53,124 @@ def modify_texture_in_frequency_domain(
     return uint8(modified_img)
 
 
+class TextureSpectrum(NamedTuple):
+    """
+    Shifted amplitude and phase of an image, as modified by modify_texture_in_frequency_domain.
+    """
+    amplitude: ndarray
+    phase: ndarray
+
+
+def texture_spectrum(img: ndarray) -> TextureSpectrum:
+    """
+    Compute the amplitude and phase that modify_texture_in_frequency_domain passes to its modification.
+
+    :param img: Input grayscale image
+    :return: Amplitude and phase of the shifted spectrum
+    """
+    dft_shift = fftshift(dft(float32(img), flags=DFT_COMPLEX_OUTPUT))
+    return TextureSpectrum(*cartToPolar(dft_shift[:, :, 0], dft_shift[:, :, 1]))
+
+
+def reconstruct_textures(spectrum: TextureSpectrum, modified: ndarray, modify_amplitude: bool = True) -> ndarray:
+    """
+    Transform a stack of modified amplitudes or phases back to images with one batched inverse FFT.
+
+    :param spectrum: Spectrum of the input image
+    :param modified: (K, H, W) modified amplitudes, or phases if modify_amplitude is False
+    :param modify_amplitude: If True, modified holds amplitudes; if False, phases
+    :return: (K, H, W) modified images
+    """
+    modified_imgs = inverse_textures(spectrum, modified, modify_amplitude)
+
+    # Normalize each image for display
+    for modified_img in modified_imgs:
+        normalize(modified_img, modified_img, 0, 255, NORM_MINMAX)
+    return uint8(modified_imgs)
+
+
+def inverse_textures(spectrum: TextureSpectrum, modified: ndarray, modify_amplitude: bool = True) -> ndarray:
+    """
+    Transform a stack of modified amplitudes or phases back to magnitudes, before normalization.
+
+    :param spectrum: Spectrum of the input image
+    :param modified: (K, H, W) modified amplitudes, or phases if modify_amplitude is False
+    :param modify_amplitude: If True, modified holds amplitudes; if False, phases
+    :return: (K, H, W) float32 magnitudes of the inverse transforms
+    """
+    amplitude, phase = (modified, spectrum.phase) if modify_amplitude else (spectrum.amplitude, modified)
+
+    # fftshift and ifftshift also act on the channel axis of the (H, W, 2) spectrum, so the channel
+    # that polarToCart fills with amplitude * cos(phase) comes back as the imaginary part
+    combined = empty(modified.shape, dtype="complex64")
+    combined.real = amplitude * sin(phase)
+    combined.imag = amplitude * cos(phase)
+
+    # Inverse DFT and magnitude spectrum
+    return np_abs(ifft2(ifftshift(combined, axes=(-2, -1)), axes=(-2, -1), overwrite_x=True))
+
+
+def sweep_texture_modifications(
+        img: ndarray,
+        modifications: Sequence[Union[Callable[[ndarray], ndarray], Real]],
+        modify_amplitude: bool = True,
+        batch_size: int = 16
+) -> ndarray:
+    """
+    Apply several modifications to the same texture, sharing its forward transform.
+
+    The forward DFT and polar split are done once, then the modified spectra are transformed back
+    batch_size at a time with a single (K, H, W) inverse FFT.
+
+    :param img: Input grayscale image
+    :param modifications: Functions to apply to amplitude or phase, or real factors (NumPy scalars included) to
+                          scale it uniformly
+    :param modify_amplitude: If True, modify amplitude; if False, modify phase
+    :param batch_size: Number of spectra transformed back together
+    :return: (K, H, W) modified images, in the order of modifications
+    """
+    spectrum = texture_spectrum(img)
+    target = spectrum.amplitude if modify_amplitude else spectrum.phase
+
+    results = empty((len(modifications),) + target.shape, dtype=uint8)
+    for start in range(0, len(modifications), batch_size):
+        batch = modifications[start:start + batch_size]
+        modified = stack([uniform_scale(target, modification) if isinstance(modification, Real)
+                          else modification(target) for modification in batch])
+        results[start:start + len(batch)] = reconstruct_textures(spectrum, modified, modify_amplitude)
+    return results
+
+
+def explore_texture_modification(img: ndarray, modify_amplitude: bool = False, max_scale: float = 3.0) -> None:
+    """
+    Display a texture whose amplitude or phase is scaled with a trackbar.
+
+    The spectrum is computed once, so each trackbar move costs a single inverse transform.
+
+    :param img: Input grayscale image
+    :param modify_amplitude: If True, scale amplitude; if False, scale phase
+    :param max_scale: Scale factor at the end of the trackbar
+    """
+    window_name = "Texture Modification"
+    namedWindow(window_name)
+    spectrum = texture_spectrum(img)
+    target = spectrum.amplitude if modify_amplitude else spectrum.phase
+
+    def on_trackbar(value: int) -> None:
+        modified = uniform_scale(target, value / 100)[None]
+        imshow(window_name, reconstruct_textures(spectrum, modified, modify_amplitude)[0])
+
+    createTrackbar("Scale (%)", window_name, 100, int(max_scale * 100), on_trackbar)
+    on_trackbar(100)  # Initialize with the unmodified texture
+
+    while True:
+        key = waitKey(1) & 0xFF
+        if key == 27:  # ESC key
+            break
+
+    destroyAllWindows()
+
+
 def uniform_scale(arr: ndarray, scale: float) -> ndarray:
     """
     Scale an array uniformly.
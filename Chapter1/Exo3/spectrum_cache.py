@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha1
+from threading import Lock
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from cv2 import imshow, waitKey, destroyAllWindows
+from numpy import ndarray, ascontiguousarray
+
+from Chapter1.Exo3.mix_images_in_frequency_domain import dft_shape, polar_spectrum, mix_polar_spectra, \
+    load_and_prepare_image
+
+
+class SpectrumCache:
+    """
+    Size-bounded LRU cache of the amplitude and phase of images, keyed by their content.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        """
+        :param max_bytes: Memory budget of the cached spectra, the least recently used are evicted beyond it
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[Tuple, Tuple[ndarray, ndarray]]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def polar_spectrum(self, img: ndarray, shape: Tuple[int, int]) -> Tuple[ndarray, ndarray]:
+        """
+        Return the amplitude and phase factor of an image, see polar_spectrum, computing them on a miss.
+
+        :param img: Input image (numpy array)
+        :param shape: Size of the transforms
+        :return: Amplitude and phase factor of the half spectrum
+        """
+        img = ascontiguousarray(img)
+        key = (sha1(img.data).hexdigest(), img.shape, img.dtype.str, tuple(shape))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # Computed outside the lock so that threads transform different images concurrently
+        entry = polar_spectrum(img, shape)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self.nbytes += entry[0].nbytes + entry[1].nbytes
+                while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                    amplitude, phase = self._entries.popitem(last=False)[1]
+                    self.nbytes -= amplitude.nbytes + phase.nbytes
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+def mix_images_batch(
+        amplitude_images: Sequence[ndarray],
+        phase_images: Sequence[ndarray],
+        pairs: Optional[Iterable[Tuple[int, int]]] = None,
+        cache: Optional[SpectrumCache] = None,
+        optimal_size: bool = False,
+        max_workers: int = 1
+) -> Dict[Tuple[int, int], ndarray]:
+    """
+    Mix the amplitude of each image of one set with the phase of each image of another.
+
+    Every image is transformed once, however many mixes it takes part in, and its spectra are kept in
+    the cache for later calls. The spectra of the requested images are held until the batch is done.
+
+    :param amplitude_images: Images providing the amplitudes
+    :param phase_images: Images providing the phases
+    :param pairs: (amplitude index, phase index) pairs to mix, or None for every combination
+    :param cache: Cache of the spectra, or None for a cache local to this call
+    :param optimal_size: Zero-pad the transforms to getOptimalDFTSize, see mix_images_real_fft
+    :param max_workers: Number of threads transforming and mixing images
+    :return: Mixed image of each pair
+    """
+    if pairs is None:
+        pairs = [(i, j) for i in range(len(amplitude_images)) for j in range(len(phase_images))]
+    else:
+        pairs = list(pairs)
+    if not pairs:
+        return {}
+    if cache is None:
+        cache = SpectrumCache()
+
+    size = amplitude_images[pairs[0][0]].shape
+    for i, j in pairs:
+        if amplitude_images[i].shape != size or phase_images[j].shape != size:
+            raise ValueError("Images must have the same dimensions")
+    shape = dft_shape(amplitude_images[pairs[0][0]], optimal_size)
+
+    sources = {("amplitude", i): amplitude_images[i] for i, _ in pairs}
+    sources.update({("phase", j): phase_images[j] for _, j in pairs})
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        spectra = dict(zip(sources, executor.map(lambda img: cache.polar_spectrum(img, shape), sources.values())))
+        mixes = executor.map(
+            lambda pair: mix_polar_spectra(spectra[("amplitude", pair[0])][0], spectra[("phase", pair[1])][1],
+                                           shape, size[:2]),
+            pairs)
+        return dict(zip(pairs, mixes))
+
+
+def main():
+    # Load and prepare images
+    images = [load_and_prepare_image('../../data/img.png'), load_and_prepare_image('../../data/img2.jpg')]
+
+    # Mix every amplitude with every phase
+    mixed_images = mix_images_batch(images, images, max_workers=2)
+
+    # Display results
+    for (i, j), mixed_image in mixed_images.items():
+        imshow(f'Amplitude {i + 1}, phase {j + 1}', mixed_image)
+    waitKey(0)
+    destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from threading import Lock
+from typing import Callable, List, Sequence, Tuple
+
+from cv2 import imshow, waitKey, destroyAllWindows
+from numpy import ndarray, float32, uint8, ones, zeros, sin, pi, arange, outer, load, save, inf
+from numpy.lib.format import open_memmap
+
+from Chapter1.Exo3.mix_images_in_frequency_domain import polar_spectrum, inverse_polar_spectra
+from Chapter1.Exo3.modify_texture_in_frequency_domain import texture_spectrum, inverse_textures, \
+    uniform_scale, load_grayscale_image
+
+
+def _tile_starts(length: int, tile_size: int, overlap: int) -> List[int]:
+    """
+    Start offsets of the tiles along one axis, the last tile being moved back to end at the border.
+    """
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, tile_size - overlap))
+    return starts + [length - tile_size]
+
+
+def _taper(length: int, overlap: int) -> ndarray:
+    """
+    1D window, flat in the middle with a raised-sine taper over the overlap at both ends.
+
+    The taper is evaluated at half-pixel offsets so that it never reaches zero, keeping border pixels
+    covered by a single tile.
+    """
+    window = ones(length, dtype=float32)
+    overlap = min(overlap, length // 2)
+    if overlap:
+        ramp = sin(pi / 2 * (arange(overlap, dtype=float32) + 0.5) / overlap) ** 2
+        window[:overlap] = ramp
+        window[length - overlap:] = ramp[::-1]
+    return window
+
+
+def _window_sums(length: int, tile_size: int, overlap: int) -> Tuple[List[int], ndarray, ndarray]:
+    """
+    Tile starts, window and total window weight along one axis.
+    """
+    starts = _tile_starts(length, tile_size, overlap)
+    window = _taper(min(tile_size, length), overlap)
+    sums = zeros(length, dtype=float32)
+    for start in starts:
+        sums[start:start + len(window)] += window
+    return starts, window, sums
+
+
+def process_tiled(
+        inputs: Sequence[ndarray],
+        tile_func: Callable[..., ndarray],
+        output_path: str,
+        tile_size: int = 1024,
+        overlap: int = 128,
+        max_workers: int = 1,
+        band_rows: int = 1024
+) -> ndarray:
+    """
+    Apply a frequency-domain operation to huge grayscale images tile by tile, with windowed overlap-add.
+
+    The inputs, typically memory-mapped with numpy.load(path, mmap_mode='r'), are read in overlapping
+    tiles. Each tile result is weighted by a window tapering over the overlap, summed into a
+    memory-mapped float32 accumulator next to the output, and divided by the total weight, which hides
+    the tile seams. Like the whole-image functions, the result is then min-max normalized to uint8.
+    Peak memory is about max_workers tiles plus one band of band_rows rows.
+
+    :param inputs: Grayscale images of the same size, e.g. memory-mapped .npy files
+    :param tile_func: Function of one tile of each input, returning the float result of the tile
+    :param output_path: Path of the uint8 .npy output
+    :param tile_size: Side of the square tiles
+    :param overlap: Number of pixels shared by neighbouring tiles
+    :param max_workers: Number of tiles processed in parallel
+    :param band_rows: Number of rows normalized at once
+    :return: The memory-mapped output image
+    """
+    height, width = inputs[0].shape[:2]
+    if any(img.shape[:2] != (height, width) for img in inputs):
+        raise ValueError("Images must have the same dimensions")
+    if not 0 <= overlap < tile_size:
+        raise ValueError("overlap must be non-negative and smaller than tile_size")
+
+    row_starts, row_window, row_sums = _window_sums(height, tile_size, overlap)
+    col_starts, col_window, col_sums = _window_sums(width, tile_size, overlap)
+    window = outer(row_window, col_window)
+
+    accumulator_path = output_path + ".acc.npy"
+    accumulator = open_memmap(accumulator_path, mode='w+', dtype=float32, shape=(height, width))
+    try:
+        lock = Lock()
+
+        def process_tile(origin: Tuple[int, int]) -> None:
+            y, x = origin
+            region = (slice(y, y + window.shape[0]), slice(x, x + window.shape[1]))
+            result = tile_func(*(float32(img[region]) for img in inputs))
+            result *= window
+            with lock:
+                accumulator[region] += result
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in executor.map(process_tile, [(y, x) for y in row_starts for x in col_starts]):
+                pass
+
+        # Divide by the window weights, then normalize to uint8 in bands
+        low, high = inf, -inf
+        for y in range(0, height, band_rows):
+            band = accumulator[y:y + band_rows]
+            band /= outer(row_sums[y:y + band_rows], col_sums)
+            low, high = min(low, float(band.min())), max(high, float(band.max()))
+
+        output = open_memmap(output_path, mode='w+', dtype=uint8, shape=(height, width))
+        scale = 255 / (high - low) if high > low else 0.0
+        for y in range(0, height, band_rows):
+            output[y:y + band_rows] = (accumulator[y:y + band_rows] - low) * scale
+        output.flush()
+    finally:
+        # Also when tile_func raises, the accumulator is scratch space
+        del accumulator
+        os.remove(accumulator_path)
+    return output
+
+
+def texture_tile_func(modification_func: Callable[[ndarray], ndarray],
+                      modify_amplitude: bool = True) -> Callable[[ndarray], ndarray]:
+    """
+    Tile function applying modify_texture_in_frequency_domain without its normalization.
+
+    :param modification_func: Function to apply to amplitude or phase
+    :param modify_amplitude: If True, modify amplitude; if False, modify phase
+    :return: Function of one tile returning its modified magnitudes
+    """
+
+    def modify_tile(tile: ndarray) -> ndarray:
+        spectrum = texture_spectrum(tile)
+        target = spectrum.amplitude if modify_amplitude else spectrum.phase
+        return inverse_textures(spectrum, modification_func(target)[None], modify_amplitude)[0]
+
+    return modify_tile
+
+
+def mix_tile(tile1: ndarray, tile2: ndarray) -> ndarray:
+    """
+    Tile function mixing the amplitude of tile1 with the phase of tile2, without normalization.
+
+    :param tile1: Tile providing the amplitude
+    :param tile2: Tile providing the phase
+    :return: Mixed values of the tile
+    """
+    amplitude, _ = polar_spectrum(tile1, tile1.shape)
+    _, phase = polar_spectrum(tile2, tile2.shape)
+    return inverse_polar_spectra(amplitude, phase, tile1.shape, tile1.shape)
+
+
+def main():
+    # Replace with the .npy file of your grayscale scan, the example ones are written to a temporary directory
+    with TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "face.npy")
+        save(input_path, load_grayscale_image("../../data/face.jpg"))
+
+        scan = load(input_path, mmap_mode='r')
+        phase_scale = texture_tile_func(lambda x: uniform_scale(x, 1.2), modify_amplitude=False)
+        modified = process_tiled([scan], phase_scale, os.path.join(directory, "face_modified.npy"), tile_size=256,
+                                 overlap=32, max_workers=4)
+
+        imshow("Original", scan)
+        imshow("Phase Modified", modified)
+        waitKey(0)
+        destroyAllWindows()
+
+        # Release the memory maps before the directory is removed
+        del scan, modified
+
+
+if __name__ == "__main__":
+    main()
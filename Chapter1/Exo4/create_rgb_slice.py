@@ -1,7 +1,41 @@
-from typing import Tuple
+from functools import lru_cache
+from typing import NamedTuple, Tuple
 
 from cv2 import imshow, createTrackbar, waitKey, destroyAllWindows, namedWindow
-from numpy import sqrt, uint8, ndarray, zeros, arctan2, degrees
+from numpy import sqrt, uint8, ndarray, zeros, arctan2, degrees, mgrid, empty, float64
+
+from Chapter1.Exo4.hsi_conversion import hsi_to_rgb_image
+
+
+class PolarGeometry(NamedTuple):
+    """
+    Per-pixel polar coordinates of a slice, shared by the HSI and saturation slices of a size.
+    """
+    mask: ndarray
+    hue: ndarray
+    saturation: ndarray
+
+
+@lru_cache(maxsize=8)
+def polar_geometry(size: int = 400) -> PolarGeometry:
+    """
+    Compute the disk mask, and the hue and saturation of the pixels inside it, for a slice size.
+
+    The arrays are computed once per size and are read-only.
+
+    :param size: Size of the slice
+    :return: Disk mask, and hue (0-360) and saturation (0-1) of the masked pixels in row-major order
+    """
+    center = size // 2
+    max_radius = center - 1
+    dy, dx = mgrid[:size, :size] - center
+    distance = sqrt(dx ** 2 + dy ** 2)
+
+    mask = distance <= max_radius
+    geometry = PolarGeometry(mask, degrees(arctan2(dy[mask], dx[mask])) % 360, distance[mask] / max_radius)
+    for array in geometry:
+        array.setflags(write=False)
+    return geometry
 
 
 def create_hsi_slice(u: int, size: int = 400) -> ndarray:
@@ -12,23 +46,33 @@ def create_hsi_slice(u: int, size: int = 400) -> ndarray:
     :param size: Size of the output image (default: 400x400)
     :return: NumPy array representing the HSI slice
     """
+    geometry = polar_geometry(size)
+    hsi = empty((1, len(geometry.hue), 3), dtype=float64)
+    hsi[0, :, 0] = geometry.hue
+    hsi[0, :, 1] = geometry.saturation
+    hsi[0, :, 2] = u / 255
+
     hsi_slice = zeros((size, size, 3), dtype=uint8)
-    center = size // 2
-    max_radius = center - 1
+    hsi_slice[geometry.mask] = hsi_to_rgb_image(hsi, bgr=True)[0]  # OpenCV uses BGR format
+    return hsi_slice
 
-    for y in range(size):
-        for x in range(size):
-            dx = x - center
-            dy = y - center
-            distance = sqrt(dx ** 2 + dy ** 2)
 
-            if distance <= max_radius:
-                hue = degrees(arctan2(dy, dx)) % 360
-                saturation = distance / max_radius
+def cached_hsi_slice(u: int, size: int = 400) -> ndarray:
+    """
+    Return the read-only HSI slice of create_hsi_slice, rendering it on the first request.
+
+    :param u: Intensity value (0-255)
+    :param size: Size of the output image (default: 400x400)
+    :return: NumPy array representing the HSI slice
+    """
+    return _cached_hsi_slice(u, size)
 
-                r, g, b = hsi_to_rgb(hue, saturation, u / 255)
-                hsi_slice[y, x] = [b, g, r]  # OpenCV uses BGR format
 
+@lru_cache(maxsize=256)
+def _cached_hsi_slice(u: int, size: int) -> ndarray:
+    # Keyed on positional arguments only, so that defaulted and explicit sizes share entries
+    hsi_slice = create_hsi_slice(u, size)
+    hsi_slice.setflags(write=False)
     return hsi_slice
 
 
@@ -77,7 +121,7 @@ def show_hsi_slices() -> None:
     namedWindow(window_name)
 
     def on_trackbar(value: int) -> None:
-        hsi_slice = create_hsi_slice(value)
+        hsi_slice = cached_hsi_slice(value)
         imshow(window_name, hsi_slice)
 
     createTrackbar("Intensity", window_name, 0, 255, on_trackbar)
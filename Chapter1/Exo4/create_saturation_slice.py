@@ -1,7 +1,11 @@
+from functools import lru_cache
+from threading import Thread
+from typing import Optional
+
 from cv2 import imshow, createTrackbar, waitKey, destroyAllWindows, namedWindow
-from numpy import sqrt, uint8, ndarray, zeros
+from numpy import uint8, ndarray, zeros
 
-from Chapter1.Exo4.create_rgb_slice import create_hsi_slice
+from Chapter1.Exo4.create_rgb_slice import polar_geometry, cached_hsi_slice
 
 
 def create_saturation_slice(u: int, size: int = 400) -> ndarray:
@@ -12,26 +16,59 @@ def create_saturation_slice(u: int, size: int = 400) -> ndarray:
     :param size: Size of the output image (default: 400x400)
     :return: NumPy array representing the saturation slice
     """
-    saturation_slice = zeros((size, size), dtype=uint8)
-    center = size // 2
-    max_radius = center - 1
+    geometry = polar_geometry(size)
     intensity = u / 255  # Normalize intensity to 0-1 range
 
-    for y in range(size):
-        for x in range(size):
-            dx = x - center
-            dy = y - center
-            distance = sqrt(dx ** 2 + dy ** 2)
+    # Adjust saturation based on intensity
+    adjusted_saturation = geometry.saturation * (1 - abs(2 * intensity - 1))
+
+    saturation_slice = zeros((size, size), dtype=uint8)
+    saturation_slice[geometry.mask] = adjusted_saturation * 255
+    return saturation_slice
 
-            if distance <= max_radius:
-                saturation = distance / max_radius
-                # Adjust saturation based on intensity
-                adjusted_saturation = saturation * (1 - abs(2 * intensity - 1))
-                saturation_slice[y, x] = int(adjusted_saturation * 255)
 
+def cached_saturation_slice(u: int, size: int = 400) -> ndarray:
+    """
+    Return the read-only saturation slice of create_saturation_slice, rendering it on the first request.
+
+    :param u: Intensity value (0-255)
+    :param size: Size of the output image (default: 400x400)
+    :return: NumPy array representing the saturation slice
+    """
+    return _cached_saturation_slice(u, size)
+
+
+@lru_cache(maxsize=256)
+def _cached_saturation_slice(u: int, size: int) -> ndarray:
+    # Keyed on positional arguments only, so that defaulted and explicit sizes share entries
+    saturation_slice = create_saturation_slice(u, size)
+    saturation_slice.setflags(write=False)
     return saturation_slice
 
 
+def warm_up_slice_cache(size: int = 400, background: bool = True) -> Optional[Thread]:
+    """
+    Render the HSI and saturation slices of all 256 intensity values into their caches.
+
+    :param size: Size of the slices (default: 400x400)
+    :param background: Render in a daemon thread instead of before returning
+    :return: The started rendering thread, or None once rendered without background
+    """
+
+    def render() -> None:
+        for u in range(256):
+            cached_hsi_slice(u, size)
+            cached_saturation_slice(u, size)
+
+    if not background:
+        render()
+        return None
+
+    thread = Thread(target=render, daemon=True)
+    thread.start()
+    return thread
+
+
 def show_hsi_and_saturation_slices() -> None:
     """
     Display HSI and saturation slices using trackbars to control the intensity value.
@@ -42,13 +79,14 @@ def show_hsi_and_saturation_slices() -> None:
     namedWindow(saturation_window)
 
     def on_trackbar(value: int) -> None:
-        hsi_slice = create_hsi_slice(value)
-        saturation_slice = create_saturation_slice(value)
+        hsi_slice = cached_hsi_slice(value)
+        saturation_slice = cached_saturation_slice(value)
         imshow(rgb_window, hsi_slice)
         imshow(saturation_window, saturation_slice)
 
     createTrackbar("Intensity", rgb_window, 0, 255, on_trackbar)
     on_trackbar(0)  # Initialize with u = 0
+    warm_up_slice_cache()
 
     while True:
         key = waitKey(1) & 0xFF
@@ -0,0 +1,188 @@
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from os import cpu_count
+from time import perf_counter
+from typing import Optional
+
+from cv2 import cvtColor, merge, absdiff, COLOR_HSV2RGB, COLOR_HSV2BGR, COLOR_RGB2HSV, COLOR_BGR2HSV
+from numpy import ndarray, array, empty, float32, float64, uint8, mod, abs as np_abs, subtract, multiply, \
+    bitwise_and, bitwise_or, left_shift, not_equal, copyto, clip, random
+
+# Component of each channel in each hue sector of hsi_to_rgb: 0 for the chroma, 1 for x, 2 for zero
+_SECTOR_COMPONENTS = array([
+    [0, 1, 2, 2, 1, 0],  # Red
+    [1, 0, 0, 1, 2, 2],  # Green
+    [2, 2, 1, 0, 0, 1],  # Blue
+], dtype=uint8)
+
+# Bit k set when the channel takes the chroma (first column) or x (second column) for floor(h / 60) == k,
+# h == 360 after the modulo falling in the last sector like in hsi_to_rgb
+_SECTOR_BITS = array([
+    [sum(1 << k for k in range(7) if components[min(k, 5)] == component) for component in (0, 1)]
+    for components in _SECTOR_COMPONENTS
+], dtype=uint8)
+
+
+def _hsi_to_rgb_band(hsi: ndarray, out: ndarray, sector_bits: ndarray, rows_per_chunk: int) -> None:
+    """
+    uint8 path of hsi_to_rgb_image on a band of rows, reusing the buffers of one chunk.
+    """
+    shape = (min(rows_per_chunk, hsi.shape[0]), hsi.shape[1])
+    h, x = empty(shape, dtype=float64), empty(shape, dtype=float64)
+    saturation_intensity = empty((2,) + shape, dtype=float64)
+    sector, bits, mask = empty(shape, dtype=uint8), empty(shape, dtype=uint8), empty(shape, dtype=uint8)
+    candidates = empty((3,) + shape, dtype=uint8)
+    differences = empty((2,) + shape, dtype=uint8)
+    channels = empty((3,) + shape, dtype=uint8)
+
+    for start in range(0, hsi.shape[0], rows_per_chunk):
+        rows = slice(start, start + rows_per_chunk)
+        n = min(rows_per_chunk, hsi.shape[0] - start)
+        if n != shape[0]:
+            h, x, saturation_intensity, sector, bits, mask, candidates, differences, channels = (
+                buffer[..., :n, :] for buffer in (h, x, saturation_intensity, sector, bits, mask, candidates,
+                                                  differences, channels))
+        s, i = saturation_intensity
+
+        copyto(h, hsi[rows, :, 0])
+        copyto(s, hsi[rows, :, 1])
+        copyto(i, hsi[rows, :, 2])
+        if h.min() < 0 or h.max() >= 360:
+            mod(h, 360, out=h)
+        # Every candidate is then within [0, 255] up to rounding, which truncation absorbs
+        in_range = saturation_intensity.min() >= 0 and saturation_intensity.max() <= 1
+
+        h_sector = h
+        h_sector /= 60
+        chroma = s
+        chroma *= i
+        m = i
+        m -= chroma
+
+        # h_sector % 2 - 1 is exactly h_sector - (floor(h_sector) | 1) as h_sector is in [0, 6]
+        copyto(sector, h_sector, casting='unsafe')
+        bitwise_or(sector, 1, out=mask)
+        copyto(x, mask)
+        absdiff(h_sector, x, dst=x)
+        subtract(1, x, out=x)
+        x *= chroma
+
+        # Candidate values, truncated like int() once clamped, which gives the same result as clamping int()
+        chroma += m
+        x += m
+        for candidate, value in zip(candidates, (chroma, x, m)):
+            value *= 255
+            if not in_range:
+                clip(value, 0, 255, out=value)
+            copyto(candidate, value, casting='unsafe')
+
+        # Each channel is the zero candidate plus, in its sectors, the wrapping difference to another one
+        subtract(candidates[:2], candidates[2], out=differences)
+        left_shift(1, sector, out=bits, dtype=uint8)
+        for channel, channel_bits in zip(channels, sector_bits):
+            copyto(channel, candidates[2])
+            for difference, component_bits in zip(differences, channel_bits):
+                bitwise_and(bits, component_bits, out=mask)
+                not_equal(mask, 0, out=mask.view(bool))
+                multiply(difference, mask, out=mask)
+                channel += mask
+
+        merge(list(channels), dst=out[rows])
+
+
+def hsi_to_rgb_image(hsi: ndarray, out: Optional[ndarray] = None, bgr: bool = False,
+                     rows_per_chunk: int = 16, max_workers: int = 1) -> ndarray:
+    """
+    Convert a whole HSI image to RGB, like hsi_to_rgb of create_rgb_slice for every pixel.
+
+    For uint8 outputs, the operations of hsi_to_rgb are replayed in float64 on chunks of rows_per_chunk
+    rows, so the result matches it bit for bit. The three candidate values (chroma, x and zero, each
+    plus m) are converted to uint8 first and each channel then picks one with sector bit masks, which
+    is branch-free. Bands of rows can be converted by a thread pool, NumPy releasing the GIL. Float
+    outputs are converted by OpenCV, whose HSV model is the same, in the 0-1 range and without
+    truncation.
+
+    :param hsi: (H, W, 3) float image of hue (0-360), saturation (0-1) and intensity (0-1)
+    :param out: Optional (H, W, 3) uint8 or float32 output buffer, which may be hsi itself for float32 outputs
+    :param bgr: Write the channels in OpenCV's BGR order instead of RGB
+    :param rows_per_chunk: Number of rows converted at once in the uint8 path
+    :param max_workers: Number of threads converting bands of rows in the uint8 path
+    :return: RGB (or BGR) image, uint8 (0-255) unless a float32 out is given
+    """
+    if out is None:
+        out = empty(hsi.shape, dtype=uint8)
+    if out.shape != hsi.shape or hsi.shape[-1] != 3:
+        raise ValueError("Images must have the same (H, W, 3) dimensions")
+
+    if out.dtype != uint8:
+        return cvtColor(hsi.astype(float32, copy=False), COLOR_HSV2BGR if bgr else COLOR_HSV2RGB, dst=out)
+
+    # OpenCV would merge the channels into a new array instead of a non-contiguous out
+    rgb = out if out.flags.c_contiguous else empty(out.shape, dtype=uint8)
+    sector_bits = _SECTOR_BITS[::-1] if bgr else _SECTOR_BITS
+    if max_workers == 1:
+        _hsi_to_rgb_band(hsi, rgb, sector_bits, rows_per_chunk)
+    else:
+        band_rows = ceil(hsi.shape[0] / max_workers)
+        bands = [slice(start, start + band_rows) for start in range(0, hsi.shape[0], band_rows)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in executor.map(lambda rows: _hsi_to_rgb_band(hsi[rows], rgb[rows], sector_bits, rows_per_chunk),
+                                  bands):
+                pass
+
+    if rgb is not out:
+        out[...] = rgb
+    return out
+
+
+def rgb_to_hsi_image(rgb: ndarray, out: Optional[ndarray] = None, bgr: bool = False) -> ndarray:
+    """
+    Convert a whole RGB image to the HSI model of hsi_to_rgb.
+
+    In this model the intensity is the largest channel and the saturation the chroma relative to it,
+    which is OpenCV's HSV, so converting back with hsi_to_rgb_image gives the input within one level
+    on uint8 images.
+
+    :param rgb: (H, W, 3) uint8 image (0-255) or float32 image (0-1)
+    :param out: Optional (H, W, 3) float32 output buffer, which may be rgb itself for float32 inputs
+    :param bgr: Read the channels in OpenCV's BGR order instead of RGB
+    :return: float32 image of hue (0-360), saturation (0-1) and intensity (0-1)
+    """
+    if out is None:
+        out = empty(rgb.shape, dtype=float32)
+    if out.shape != rgb.shape or rgb.shape[-1] != 3:
+        raise ValueError("Images must have the same (H, W, 3) dimensions")
+
+    if rgb.dtype == uint8:
+        out[...] = rgb
+        out *= 1 / 255
+        rgb = out
+    return cvtColor(rgb.astype(float32, copy=False), COLOR_BGR2HSV if bgr else COLOR_RGB2HSV, dst=out)
+
+
+def main() -> None:
+    """
+    Time the conversion of full HD frames.
+    """
+    frame = random.default_rng(0).integers(0, 256, (1080, 1920, 3), dtype=uint8)
+    hsi = empty(frame.shape, dtype=float32)
+    rgb = empty(frame.shape, dtype=uint8)
+
+    start = perf_counter()
+    for _ in range(10):
+        rgb_to_hsi_image(frame, out=hsi, bgr=True)
+    to_hsi = (perf_counter() - start) / 10
+
+    workers = cpu_count() or 1
+    start = perf_counter()
+    for _ in range(10):
+        hsi_to_rgb_image(hsi, out=rgb, bgr=True, max_workers=workers)
+    to_rgb = (perf_counter() - start) / 10
+
+    print(f"RGB to HSI of a 1920x1080 frame: {to_hsi * 1000:.1f} ms")
+    print(f"HSI to RGB of a 1920x1080 frame ({workers} thread(s)): {to_rgb * 1000:.1f} ms")
+    print(f"Largest round-trip error: {np_abs(rgb.astype(int) - frame).max()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from os import cpu_count
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from cv2 import imread, IMREAD_GRAYSCALE, resize
+from numpy import ndarray, array_equal
+
+from Chapter2.Exo1.histogram_equalization_r import sigma_filter
+from Chapter2.Exo1.parallel_sigma_filter import sigma_filter_parallel
+
+
+def benchmark_sigma_filter(
+        img: ndarray,
+        window_size: int = 5,
+        sigma: float = 15.0,
+        workers: Optional[List[int]] = None,
+        band_rows: Optional[int] = None,
+        repeats: int = 3
+) -> Dict[int, float]:
+    """
+    Time the serial and band-parallel sigma filter.
+
+    Parameters:
+    img: np.ndarray
+        Input grayscale image.
+    window_size: int
+        Size of the window (must be odd).
+    sigma: float
+        Standard deviation threshold.
+    workers: Optional[List[int]]
+        Worker counts to time, 0 standing for the serial sigma_filter. Defaults to 0, 1, 2, 4 and the CPU count.
+    band_rows: Optional[int]
+        Number of rows per band, or None to give each worker one band.
+    repeats: int
+        Number of runs per worker count, the best one is kept.
+
+    Returns:
+    Dict[int, float]
+        Best wall time in seconds for each worker count.
+    """
+    if workers is None:
+        workers = sorted({0, 1, 2, 4, cpu_count() or 1})
+
+    reference = sigma_filter(img, window_size, sigma)
+    timings = {}
+    for max_workers in workers:
+        best = float('inf')
+        for _ in range(repeats):
+            start = perf_counter()
+            if max_workers == 0:
+                filtered_img = sigma_filter(img, window_size, sigma)
+            else:
+                filtered_img = sigma_filter_parallel(img, window_size, sigma, max_workers, band_rows)
+            best = min(best, perf_counter() - start)
+
+        # Bands with their halos must give exactly the serial result
+        if not array_equal(reference, filtered_img):
+            raise RuntimeError(f"Image filtered with {max_workers} workers differs from the serial filter")
+        timings[max_workers] = best
+
+    return timings
+
+
+def main():
+    img = imread('../../data/noise.png', IMREAD_GRAYSCALE)
+
+    if img is None:
+        print('Error: Could not open or find the image.')
+        return
+
+    # Scale up to a few megapixels so that the process pool pays off
+    img = resize(img, (img.shape[1] * 4, img.shape[0] * 4))
+    timings = benchmark_sigma_filter(img)
+    serial = timings[0]
+    for max_workers, elapsed in timings.items():
+        label = "serial" if max_workers == 0 else f"{max_workers:3d} workers"
+        print(f"{label:>11}: {elapsed * 1000:8.2f} ms  ({serial / elapsed:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
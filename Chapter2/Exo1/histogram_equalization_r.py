@@ -1,13 +1,20 @@
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Mapping, Iterator
 
-from cv2 import imshow, waitKey, destroyAllWindows, imread, IMREAD_GRAYSCALE
-from numpy import histogram, cumsum, array, mean, arange, sum, uint8, ndarray, clip, linspace, meshgrid
+from cv2 import imshow, waitKey, destroyAllWindows, imread, IMREAD_GRAYSCALE, copyMakeBorder, BORDER_REFLECT, \
+    compare, absdiff, bitwise_and, CMP_LE, boxFilter, CV_32S
+from numpy import histogram, cumsum, array, mean, arange, sum, uint8, ndarray, clip, linspace, meshgrid, floor, \
+    zeros, int32, int64, bincount, argsort, concatenate, nonzero
 
 
 def sigma_filter(img: ndarray, window_size: int, sigma: float) -> ndarray:
     """
     Apply sigma filter to a grayscale image.
 
+    Each pixel is replaced by the mean of the values of its window that are within sigma of it,
+    truncated to the image type, with mode='reflect' borders. uint8 images with odd window sizes
+    are filtered natively (see _sigma_filter_shifted and _sigma_filter_levels) with the same result
+    as the generic filter used otherwise.
+
     Parameters:
     img: np.ndarray
         Input grayscale image.
@@ -20,6 +27,20 @@ def sigma_filter(img: ndarray, window_size: int, sigma: float) -> ndarray:
     np.ndarray
         Filtered image.
     """
+    if img.dtype == uint8 and img.ndim == 2 and window_size % 2 == 1:
+        if not sigma >= 0:
+            # Not even the center value is within sigma of itself
+            return img.copy()
+        # Values are integers, so |v - c| <= sigma is |v - c| <= floor(sigma)
+        distance = int(min(floor(sigma), 255))
+        levels = int(img.max()) - int(img.min()) + 1
+        # Both paths scale with the pixel count. On 800x800 images, the levels path costs about as much as
+        # 320 window offsets of the shifted path plus one offset per grey level, e.g. 0.5 s against 0.22 s
+        # for a full-range image and a window of 17
+        if window_size ** 2 <= levels + 320:
+            return _sigma_filter_shifted(img, window_size, distance)
+        return _sigma_filter_levels(img, window_size, distance)
+
     from scipy.ndimage import generic_filter
 
     def filter_func(values):
@@ -42,11 +63,149 @@ def sigma_filter(img: ndarray, window_size: int, sigma: float) -> ndarray:
     return filtered_img
 
 
-def histogram_equalization_with_r(img: ndarray, r_values: List[float], Gmax: int = 255) -> Tuple[
-    Dict[float, ndarray], Dict[float, ndarray]]:
+def _sigma_filter_shifted(img: ndarray, window_size: int, distance: int) -> ndarray:
+    """
+    Sigma filter of a uint8 image accumulating, for every window offset, the shifted values within
+    distance of the center and their count. The cost grows with window_size ** 2.
+    """
+    radius = window_size // 2
+    height, width = img.shape
+    padded = copyMakeBorder(img, radius, radius, radius, radius, BORDER_REFLECT)
+
+    counts = zeros(img.shape, dtype=int32)
+    sums = zeros(img.shape, dtype=int32)
+    for dy in range(window_size):
+        for dx in range(window_size):
+            values = padded[dy:dy + height, dx:dx + width]
+            valid = compare(absdiff(values, img), distance, CMP_LE)  # 255 where valid
+            counts += valid
+            sums += bitwise_and(values, valid)
+
+    # The mean is truncated like the uint8 output of the generic filter
+    counts //= 255
+    return (sums // counts).astype(uint8)
+
+
+def _sigma_filter_levels(img: ndarray, window_size: int, distance: int) -> ndarray:
+    """
+    Sigma filter of a uint8 image from sliding-window histograms, in a cost independent of the window size.
+
+    For every grey level t, a box filter of img <= t gives the count N_t of window values up to t,
+    and Q_t accumulates N_0 + ... + N_t. The pixels of level c need the values in [a, b], their
+    range clipped to 0-255: their count is N_b - N_(a-1) and, summing by parts, their sum is
+    b N_b - a N_(a-1) - (Q_(b-1) - Q_(a-1)). Each pixel gathers these terms when t reaches the
+    corresponding level, so the cost is one box filter per grey level.
+    """
+    flat = img.ravel()
+    level_counts = bincount(flat, minlength=256)
+    order = argsort(flat, kind='stable')
+    starts = concatenate(([0], cumsum(level_counts)))
+
+    # Levels whose pixels gather N_t and Q_t at step t, for each term
+    upper_events: List[List[int]] = [[] for _ in range(256)]  # t = b
+    before_upper_events: List[List[int]] = [[] for _ in range(256)]  # t = b - 1
+    before_lower_events: List[List[int]] = [[] for _ in range(256)]  # t = a - 1
+    for c in nonzero(level_counts)[0]:
+        lower, upper = max(c - distance, 0), min(c + distance, 255)
+        upper_events[upper].append(c)
+        if upper > 0:
+            before_upper_events[upper - 1].append(c)
+        if lower > 0:
+            before_lower_events[lower - 1].append(c)
+
+    counts = zeros(flat.size, dtype=int64)
+    sums = zeros(flat.size, dtype=int64)
+    below = zeros(flat.size, dtype=int32)  # N_t
+    accumulated = zeros(flat.size, dtype=int32 if 256 * window_size ** 2 < 2 ** 31 else int64)  # Q_t
+    for t in range(256):
+        if level_counts[t]:
+            below = boxFilter((img <= t).view(uint8), CV_32S, (window_size, window_size), normalize=False,
+                              borderType=BORDER_REFLECT).ravel()
+        accumulated += below
+
+        for c in upper_events[t]:
+            pixels = order[starts[c]:starts[c + 1]]
+            counts[pixels] += below[pixels]
+            sums[pixels] += t * below[pixels].astype(int64)
+        for c in before_upper_events[t]:
+            pixels = order[starts[c]:starts[c + 1]]
+            sums[pixels] -= accumulated[pixels]
+        for c in before_lower_events[t]:
+            pixels = order[starts[c]:starts[c + 1]]
+            counts[pixels] -= below[pixels]
+            sums[pixels] -= (t + 1) * below[pixels].astype(int64)
+            sums[pixels] += accumulated[pixels]
+
+    # The mean is truncated like the uint8 output of the generic filter
+    return (sums // counts).reshape(img.shape).astype(uint8)
+
+
+class EqualizedImages(Mapping):
+    """
+    Equalized images of a sweep over r, each mapped through its lookup table on first access.
+    """
+
+    def __init__(self, img: ndarray, r_values: List[float], luts: ndarray):
+        """
+        Parameters:
+        img: np.ndarray
+            Input grayscale image.
+        r_values: List[float]
+            List of r values.
+        luts: np.ndarray
+            (R, Gmax + 1) lookup tables, one per r value.
+        """
+        self.img = img
+        self.luts = luts
+        self._rows = {r: i for i, r in enumerate(r_values)}
+        self._images: Dict[float, ndarray] = {}
+
+    def __getitem__(self, r: float) -> ndarray:
+        if r not in self._images:
+            self._images[r] = self.luts[self._rows[r]][self.img.astype(int)]
+        return self._images[r]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+def equalization_luts(hI: ndarray, r_values: List[float], Gmax: int = 255) -> ndarray:
+    """
+    Compute the equalization curves g of all r values at once.
+
+    Parameters:
+    hI: np.ndarray
+        Relative frequencies of the grey levels 0 to Gmax.
+    r_values: List[float]
+        List of r values.
+    Gmax: int
+        Maximum grey level (default is 255).
+
+    Returns:
+    np.ndarray
+        (R, Gmax + 1) uint8 lookup tables, one row per r value.
+    """
+    # Compute hI(w)^r for every r
+    hI_r = hI[None, :] ** array(r_values, dtype=float)[:, None]
+    Q = sum(hI_r, axis=1)
+    cI_r = cumsum(hI_r, axis=1)
+    g = (Gmax / Q)[:, None] * cI_r
+    return clip(g, 0, Gmax).astype(uint8)
+
+
+def histogram_equalization_with_r(img: ndarray, r_values: List[float], Gmax: int = 255, lazy: bool = False) -> Tuple[
+    Mapping[float, ndarray], Dict[float, ndarray]]:
     """
     Apply histogram equalization with varying r.
 
+    The lookup tables of all r values are built in one vectorized step. As each equalized image is
+    its lookup table applied to the input, its histogram is the input level counts summed by output
+    level, a weighted bincount of the table that does not touch the pixels. Only the images need
+    the full image mapped, which lazy defers to the first access of each r.
+
     Parameters:
     img: np.ndarray
         Input grayscale image.
@@ -54,31 +213,24 @@ def histogram_equalization_with_r(img: ndarray, r_values: List[float], Gmax: int
         List of r values.
     Gmax: int
         Maximum grey level (default is 255).
+    lazy: bool
+        Map the image for an r value only when its equalized image is requested (default is False).
 
     Returns:
-    Tuple[Dict[float, np.ndarray], Dict[float, np.ndarray]]
+    Tuple[Mapping[float, np.ndarray], Dict[float, np.ndarray]]
         A tuple of dictionaries mapping r to equalized images and histograms.
     """
-    images = {}
-    histograms = {}
-
     # Compute the histogram hI(u)
-    hI, bins = histogram(img.flatten(), bins=Gmax + 1, range=(0, Gmax), density=False)
-    hI = hI / img.size  # Convert to relative frequencies
-
-    for r in r_values:
-        # Compute hI(w)^r
-        hI_r = hI ** r
-        Q = sum(hI_r)
-        cI_r = cumsum(hI_r)
-        g = (Gmax / Q) * cI_r
-        g = clip(g, 0, Gmax).astype(uint8)
+    counts, bins = histogram(img.flatten(), bins=Gmax + 1, range=(0, Gmax), density=False)
+    hI = counts / img.size  # Convert to relative frequencies
 
-        # Map the image
-        img_equalized = g[img.astype(int)]
+    luts = equalization_luts(hI, r_values, Gmax)
+    histograms = {r: bincount(g, weights=counts, minlength=Gmax + 1).astype(counts.dtype)
+                  for r, g in zip(r_values, luts)}
 
-        images[r] = img_equalized
-        histograms[r] = histogram(img_equalized.flatten(), bins=Gmax + 1, range=(0, Gmax), density=False)[0]
+    images = EqualizedImages(img, r_values, luts)
+    if not lazy:
+        images = {r: images[r] for r in images}
 
     return images, histograms
 
@@ -150,7 +302,7 @@ def main():
     r_values = linspace(0.5, 2.0, num=16)  # For example, from 0.5 to 2.0
 
     # Apply histogram equalization with varying r
-    images, histograms = histogram_equalization_with_r(filtered_img_uint8, r_values.tolist())
+    images, histograms = histogram_equalization_with_r(filtered_img_uint8, r_values.tolist(), lazy=True)
 
     # Visualize histograms
     visualize_histograms(histograms)
@@ -0,0 +1,123 @@
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from typing import Optional, Tuple
+
+from cv2 import imshow, waitKey, destroyAllWindows, imread, IMREAD_GRAYSCALE, setNumThreads
+from numpy import ndarray, dtype as np_dtype
+
+from Chapter2.Exo1.histogram_equalization_r import sigma_filter
+
+
+def _init_worker() -> None:
+    # Each process filters its own band, avoid oversubscribing the cores with OpenCV threads
+    setNumThreads(1)
+
+
+def _filter_band(input_name: str, output_name: str, shape: Tuple[int, int], dtype: str, start: int, stop: int,
+                 window_size: int, sigma: float) -> None:
+    """
+    Filter rows start to stop of an image in shared memory, reading window_size // 2 halo rows on each side.
+    """
+    input_shm = SharedMemory(name=input_name)
+    output_shm = SharedMemory(name=output_name)
+    try:
+        img = ndarray(shape, dtype=dtype, buffer=input_shm.buf)
+        filtered_img = ndarray(shape, dtype=dtype, buffer=output_shm.buf)
+
+        # Halo rows come from the neighbouring bands, only the image borders are reflected
+        halo = window_size // 2
+        top, bottom = max(start - halo, 0), min(stop + halo, shape[0])
+        filtered_band = sigma_filter(img[top:bottom], window_size, sigma)
+        filtered_img[start:stop] = filtered_band[start - top:stop - top]
+
+        del img, filtered_img
+    finally:
+        input_shm.close()
+        output_shm.close()
+
+
+def sigma_filter_parallel(
+        img: ndarray,
+        window_size: int,
+        sigma: float,
+        max_workers: Optional[int] = None,
+        band_rows: Optional[int] = None
+) -> ndarray:
+    """
+    Apply sigma filter to a grayscale image with a process pool.
+
+    The image and the result are placed in shared memory and split into bands of rows. Each worker
+    filters a band together with window_size // 2 halo rows above and below it and writes the band
+    rows of the result, so the output is identical to sigma_filter, mode='reflect' borders included.
+
+    Parameters:
+    img: np.ndarray
+        Input grayscale image.
+    window_size: int
+        Size of the window (must be odd).
+    sigma: float
+        Standard deviation threshold.
+    max_workers: Optional[int]
+        Number of worker processes, or None for the CPU count.
+    band_rows: Optional[int]
+        Number of rows per band, or None to give each worker one band.
+
+    Returns:
+    np.ndarray
+        Filtered image.
+    """
+    height = img.shape[0]
+    if max_workers is None:
+        max_workers = cpu_count() or 1
+    if band_rows is None:
+        band_rows = ceil(height / max_workers)
+    if band_rows < 1:
+        raise ValueError("band_rows must be positive")
+
+    input_shm = SharedMemory(create=True, size=max(img.nbytes, 1))
+    output_shm = SharedMemory(create=True, size=max(img.nbytes, 1))
+    try:
+        shared_img = ndarray(img.shape, dtype=img.dtype, buffer=input_shm.buf)
+        shared_img[...] = img
+        del shared_img
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            futures = [
+                executor.submit(_filter_band, input_shm.name, output_shm.name, img.shape, np_dtype(img.dtype).str,
+                                start, min(start + band_rows, height), window_size, sigma)
+                for start in range(0, height, band_rows)
+            ]
+            for future in futures:
+                future.result()
+
+        filtered_img = ndarray(img.shape, dtype=img.dtype, buffer=output_shm.buf).copy()
+    finally:
+        for shm in (input_shm, output_shm):
+            shm.close()
+            shm.unlink()
+
+    return filtered_img
+
+
+def main():
+    """
+    Filter the noisy image with a process pool.
+    """
+    img = imread('../../data/noise.png', IMREAD_GRAYSCALE)
+
+    if img is None:
+        print('Error: Could not open or find the image.')
+        return
+
+    filtered_img = sigma_filter_parallel(img, window_size=5, sigma=15.0)
+
+    imshow('Original Image', img)
+    imshow('Sigma Filtered Image', filtered_img)
+    waitKey(0)
+    destroyAllWindows()
+
+
+if __name__ == '__main__':
+    main()